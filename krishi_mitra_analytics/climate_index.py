@@ -0,0 +1,76 @@
+# climate_index.py
+"""Range-query index over the (Temperature, Rainfall, Humidity) space.
+
+Used by the "Crop Suggestions" tab and CropBot's "Best Crop for My
+Conditions". Each dimension is kept as a sorted copy; a box query binary
+searches every dimension, scans only the band of the most selective one
+and aggregates yields per crop with bincount, instead of masking and
+grouping the whole frame on every slider move.
+"""
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["Temperature", "Rainfall", "Humidity"]
+
+
+class ClimateIndex:
+    """Sorted multi-column index for box queries over climate conditions"""
+
+    def __init__(self, data):
+        self.data = data
+        self.values = {column: data[column].to_numpy(dtype=np.float64) for column in DIMENSIONS}
+        # NaNs sort last and never fall inside a searched band, just like Series.between
+        self.orders = {column: np.argsort(values, kind="stable") for column, values in self.values.items()}
+        self.sorted = {column: self.values[column][order] for column, order in self.orders.items()}
+
+        # Crop codes in name order, matching the order groupby("Crops") would produce
+        self.crop_codes, self.crop_names = pd.factorize(data["Crops"], sort=True)
+        yields = data["Yeilds"].to_numpy(dtype=np.float64)
+        self.has_yield = ~np.isnan(yields)
+        self.yields = np.where(self.has_yield, yields, 0.0)
+
+    def query(self, temperature, rainfall, humidity, margins=(2, 500, 10)):
+        """Row positions whose conditions fall inside the box (bounds inclusive)"""
+        bounds = {
+            column: (center - margin, center + margin)
+            for column, center, margin in zip(DIMENSIONS, (temperature, rainfall, humidity), margins)
+        }
+        bands = {
+            column: (
+                np.searchsorted(self.sorted[column], low, side="left"),
+                np.searchsorted(self.sorted[column], high, side="right"),
+            )
+            for column, (low, high) in bounds.items()
+        }
+
+        # Scan only the narrowest band and check the other two dimensions there
+        pivot = min(bands, key=lambda column: bands[column][1] - bands[column][0])
+        start, stop = bands[pivot]
+        candidates = self.orders[pivot][start:stop]
+        inside = np.ones(len(candidates), dtype=bool)
+        for column, (low, high) in bounds.items():
+            if column != pivot:
+                values = self.values[column][candidates]
+                inside &= (values >= low) & (values <= high)
+        return np.sort(candidates[inside])
+
+    def rows(self, temperature, rainfall, humidity, margins=(2, 500, 10)):
+        """Matching rows of the indexed frame, in their original order"""
+        return self.data.iloc[self.query(temperature, rainfall, humidity, margins)]
+
+    def top_crops(self, temperature, rainfall, humidity, n=5, margins=(2, 500, 10)):
+        """Mean yield per crop over the matching rows, best first"""
+        positions = self.query(temperature, rainfall, humidity, margins)
+        codes = self.crop_codes[positions]
+        valid = codes >= 0
+        codes, positions = codes[valid], positions[valid]
+
+        size = len(self.crop_names)
+        present = np.bincount(codes, minlength=size) > 0
+        totals = np.bincount(codes, weights=self.yields[positions], minlength=size)
+        counts = np.bincount(codes, weights=self.has_yield[positions], minlength=size)
+        with np.errstate(invalid="ignore"):
+            means = totals / counts
+
+        best = pd.Series(means[present], index=pd.Index(self.crop_names[present], name="Crops"), name="Yeilds")
+        return best.sort_values(ascending=False).head(n)
@@ -0,0 +1,43 @@
+# crop_profiles.py
+"""Per-crop climate profile table.
+
+Built once per data file version, it holds the mean, standard deviation
+and quartiles of Temperature, Rainfall and Humidity for every crop, plus
+its modal sowing season. The practice checks and CropBot answers read a
+row from here instead of filtering the full frame on each query.
+"""
+import pandas as pd
+
+CLIMATE_COLUMNS = ["Temperature", "Rainfall", "Humidity"]
+
+
+def modal_seasons(data):
+    """Most frequent season per crop; ties resolve to the first name, like Series.mode()"""
+    counts = data.dropna(subset=["Season"]).groupby(["Crops", "Season"], observed=True).size().reset_index(name="Count")
+    counts = counts.sort_values(["Crops", "Count", "Season"], ascending=[True, False, True])
+    return counts.drop_duplicates("Crops").set_index("Crops")["Season"]
+
+
+def build_crop_profiles(data):
+    """Climate statistics and modal season for every crop, indexed by crop name"""
+    grouped = data.groupby("Crops", observed=True)[CLIMATE_COLUMNS]
+    stats = {
+        "mean": grouped.mean(),
+        "std": grouped.std(),
+        "q25": grouped.quantile(0.25),
+        "median": grouped.median(),
+        "q75": grouped.quantile(0.75),
+    }
+    profiles = pd.concat(
+        {f"{column}_{stat}": table[column] for stat, table in stats.items() for column in CLIMATE_COLUMNS},
+        axis=1,
+    )
+    profiles["Season_mode"] = modal_seasons(data)
+    return profiles
+
+
+def crop_profile(profiles, crop):
+    """Profile row for one crop, or None when the crop has no data"""
+    if crop not in profiles.index:
+        return None
+    return profiles.loc[crop]
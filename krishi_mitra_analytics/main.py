@@ -1,13 +1,94 @@
+import os
+import sys
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from climate_index import ClimateIndex
+from crop_profiles import build_crop_profiles, crop_profile
+from yield_cube import CubeStore
+
+# Shared helpers (e.g. the gazetteer matcher) live with the ML scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "py files"))
+from datastore import load_table  # noqa: E402
+from gazetteer import Gazetteer  # noqa: E402
+
+DATA_FILE = "data_season.csv"
+
+# Number of distinct filter selections whose aggregates are kept in memory
+AGGREGATE_CACHE_SIZE = 64
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_data(path, mtime):
+    """Load and normalize the dataset once per file version (mtime is part of the cache key)"""
+    data = load_table(path)  # typed Parquet copy, categorical Season/Crops/Location
+    data.columns = data.columns.str.strip().str.capitalize()  # Normalize columns
+    return data
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def climate_index(mtime):
+    """Range index over Temperature/Rainfall/Humidity shared by the suggestion tabs"""
+    return ClimateIndex(load_data(DATA_FILE, mtime))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def crop_profiles(mtime):
+    """Per-crop climate profile table, rebuilt whenever the data file changes"""
+    return build_crop_profiles(load_data(DATA_FILE, mtime))
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def crop_matcher(mtime):
+    """Gazetteer over the dataset's crop names for CropBot's free-text questions"""
+    return Gazetteer().add_all("crop", load_data(DATA_FILE, mtime)["Crops"].unique()).build()
+
+
+@st.cache_resource(show_spinner=False)
+def cube_store(path):
+    """Shared yield/price cube, updated incrementally as rows are appended to the file"""
+    return CubeStore(path)
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_SIZE, show_spinner=False)
+def filter_aggregates(mtime, seasons, crops, locations):
+    """Compute the Overview and Trends aggregates for one filter selection from the cube"""
+    cube = cube_store(DATA_FILE).refresh()
+    selection = (seasons, crops, locations)
+
+    irrigation_dist = cube.rollup("Irrigation", *selection)["Rows"].sort_values(ascending=False).reset_index()
+    irrigation_dist.columns = ["Irrigation", "Count"]
+    return {
+        "crop_yield_avg": cube.rollup("Crops", *selection)["Yeilds_mean"].rename("Yeilds")
+            .sort_values(ascending=False).reset_index(),
+        "irrigation_dist": irrigation_dist,
+        "location_yield": cube.rollup("Location", *selection)["Yeilds_sum"].rename("Yeilds")
+            .sort_values(ascending=False).reset_index(),
+        "season_yield": cube.rollup("Season", *selection)["Yeilds_mean"].rename("Yeilds").reset_index(),
+        "season_crop_dist": cube.rollup(["Season", "Crops"], *selection)["Rows"].reset_index(name='Count'),
+    }
+
+
+@st.cache_data(max_entries=AGGREGATE_CACHE_SIZE, show_spinner=False)
+def filtered_csv(mtime, seasons, crops, locations):
+    """Raw rows of one filter selection, for the download button"""
+    data = load_data(DATA_FILE, mtime)
+    return data[
+        data["Season"].isin(seasons) &
+        data["Crops"].isin(crops) &
+        data["Location"].isin(locations)
+    ].to_csv(index=False)
 
-# Load data
-df = pd.read_csv("data_season.csv")
-df.columns = df.columns.str.strip().str.capitalize()  # Normalize columns
 
 st.set_page_config(layout="wide")
+
+# Load data (re-read only when the file on disk changes)
+data_mtime = os.path.getmtime(DATA_FILE)
+df = load_data(DATA_FILE, data_mtime)
+
 st.title("🌾 Crop Production & Suggestion Dashboard")
 
 # Sidebar filters
@@ -16,11 +97,16 @@ selected_season = st.sidebar.multiselect("Select Season", df["Season"].unique(),
 selected_crops = st.sidebar.multiselect("Select Crops", df["Crops"].unique(), default=df["Crops"].unique())
 selected_location = st.sidebar.multiselect("Select Location", df["Location"].unique(), default=df["Location"].unique())
 
-filtered = df[
-    df["Season"].isin(selected_season) &
-    df["Crops"].isin(selected_crops) &
-    df["Location"].isin(selected_location)
-]
+profiles = crop_profiles(data_mtime)
+
+# Sorted tuples so the same selection hits the cache regardless of click order
+selection = (
+    data_mtime,
+    tuple(sorted(selected_season)),
+    tuple(sorted(selected_crops)),
+    tuple(sorted(selected_location)),
+)
+aggregates = filter_aggregates(*selection)
 
 # Tabs
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
@@ -34,23 +120,23 @@ tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
 
 with tab1:
     st.subheader("Top 10 Crops by Average Yield")
-    crop_yield_avg = filtered.groupby("Crops")["Yeilds"].mean().sort_values(ascending=False).reset_index()
+    crop_yield_avg = aggregates["crop_yield_avg"]
     fig1 = px.bar(crop_yield_avg.head(10), x="Crops", y="Yeilds", color="Crops")
     st.plotly_chart(fig1, use_container_width=True)
 
     st.subheader("Distribution of Irrigation Types")
-    irrigation_dist = filtered["Irrigation"].value_counts().reset_index()
-    irrigation_dist.columns = ["Irrigation", "Count"]
+    irrigation_dist = aggregates["irrigation_dist"]
     fig2 = px.pie(irrigation_dist, names="Irrigation", values="Count")
     st.plotly_chart(fig2, use_container_width=True)
 
     st.subheader("Top 10 Locations by Total Yield")
-    location_yield = filtered.groupby("Location")["Yeilds"].sum().sort_values(ascending=False).reset_index()
+    location_yield = aggregates["location_yield"]
     fig3 = px.bar(location_yield.head(10), x="Location", y="Yeilds", color="Location")
     st.plotly_chart(fig3, use_container_width=True)
 
     st.subheader("Download Filtered Data")
-    st.download_button("⬇️ Download CSV", filtered.to_csv(index=False), file_name="filtered_crop_data.csv")
+    # The rows are only filtered and serialized when the button is clicked
+    st.download_button("⬇️ Download CSV", partial(filtered_csv, *selection), file_name="filtered_crop_data.csv")
 
 with tab2:
     st.subheader("Get Crop Suggestions Based on Environment")
@@ -58,14 +144,9 @@ with tab2:
     rain = st.slider("Rainfall (mm)", 0.0, 5000.0, 1500.0)
     humidity = st.slider("Humidity (%)", 10.0, 100.0, 60.0)
 
-    suggested = df[
-        (df['Temperature'].between(temp - 2, temp + 2)) &
-        (df['Rainfall'].between(rain - 500, rain + 500)) &
-        (df['Humidity'].between(humidity - 10, humidity + 10))
-    ]
+    best = climate_index(data_mtime).top_crops(temp, rain, humidity)
 
-    if not suggested.empty:
-        best = suggested.groupby("Crops")["Yeilds"].mean().sort_values(ascending=False).head(5)
+    if not best.empty:
         st.success("Top 5 crops to grow in this environment:")
         st.table(best)
     else:
@@ -73,12 +154,12 @@ with tab2:
 
 with tab3:
     st.subheader("Average Yield per Season")
-    season_yield = filtered.groupby("Season")["Yeilds"].mean().reset_index()
+    season_yield = aggregates["season_yield"]
     fig4 = px.line(season_yield, x="Season", y="Yeilds", markers=True)
     st.plotly_chart(fig4, use_container_width=True)
 
     st.subheader("Crop Distribution by Season")
-    season_crop_dist = filtered.groupby(["Season", "Crops"]).size().reset_index(name='Count')
+    season_crop_dist = aggregates["season_crop_dist"]
     fig5 = px.bar(season_crop_dist, x="Season", y="Count", color="Crops", barmode="stack")
     st.plotly_chart(fig5, use_container_width=True)
 
@@ -88,10 +169,10 @@ with tab4:
     input_temp = st.slider("Your Temperature (°C)", 10.0, 60.0, 25.0)
     input_rain = st.slider("Your Rainfall (mm)", 0.0, 5000.0, 1500.0)
 
-    ref = df[df["Crops"] == check_crop]
-    if not ref.empty:
-        ideal_temp = ref["Temperature"].mean()
-        ideal_rain = ref["Rainfall"].mean()
+    ref = crop_profile(profiles, check_crop)
+    if ref is not None:
+        ideal_temp = ref["Temperature_mean"]
+        ideal_rain = ref["Rainfall_mean"]
 
         issues = []
         if abs(input_temp - ideal_temp) > 3:
@@ -188,13 +269,8 @@ with tab6:
         rain = st.slider("🌧️ Rainfall (mm)", 0.0, 5000.0, 1500.0)
         humidity = st.slider("💧 Humidity (%)", 10.0, 100.0, 60.0)
 
-        suggested = df[
-            (df['Temperature'].between(temp - 2, temp + 2)) &
-            (df['Rainfall'].between(rain - 500, rain + 500)) &
-            (df['Humidity'].between(humidity - 10, humidity + 10))
-        ]
-        if not suggested.empty:
-            top = suggested.groupby("Crops")["Yeilds"].mean().sort_values(ascending=False).head(5)
+        top = climate_index(data_mtime).top_crops(temp, rain, humidity)
+        if not top.empty:
             st.success("Top 5 crops for your conditions:")
             st.table(top)
         else:
@@ -203,20 +279,20 @@ with tab6:
     elif query_type == "Sowing Time of a Crop":
         selected_crop = st.selectbox("🌱 Select a crop", sorted(df["Crops"].unique()))
         if selected_crop:
-            seasons = df[df["Crops"] == selected_crop]["Season"].mode()
-            if not seasons.empty:
-                st.success(f"🗓️ Sow **{selected_crop}** during the **{seasons[0]}** season.")
+            profile = crop_profile(profiles, selected_crop)
+            if profile is not None and pd.notna(profile["Season_mode"]):
+                st.success(f"🗓️ Sow **{selected_crop}** during the **{profile['Season_mode']}** season.")
             else:
                 st.warning("No sowing time data found.")
 
     elif query_type == "Ideal Conditions for a Crop":
         selected_crop = st.selectbox("🔍 Select crop", sorted(df["Crops"].unique()))
         if selected_crop:
-            crop_df = df[df["Crops"] == selected_crop]
-            if not crop_df.empty:
-                temp = crop_df["Temperature"].mean()
-                rain = crop_df["Rainfall"].mean()
-                humidity = crop_df["Humidity"].mean()
+            profile = crop_profile(profiles, selected_crop)
+            if profile is not None:
+                temp = profile["Temperature_mean"]
+                rain = profile["Rainfall_mean"]
+                humidity = profile["Humidity_mean"]
                 st.success(
                     f"🌡️ Temperature: {temp:.1f}°C\n"
                     f"🌧️ Rainfall: {rain:.1f} mm\n"
@@ -227,7 +303,8 @@ with tab6:
 
     elif query_type == "Crops Suitable for a Season":
         selected_season = st.selectbox("🗓️ Select Season", sorted(df["Season"].unique()))
-        crops_in_season = df[df["Season"] == selected_season]["Crops"].value_counts().head(10)
+        crops_in_season = df[df["Season"] == selected_season]["Crops"].value_counts()
+        crops_in_season = crops_in_season[crops_in_season > 0].head(10)
         if not crops_in_season.empty:
             st.success(f"🌱 Common crops in **{selected_season}** season:")
             st.table(crops_in_season)
@@ -242,23 +319,21 @@ with tab6:
             if "best crop" in user_input or "what crop" in user_input:
                 st.info("Try using the 'Best Crop for My Conditions' section above.")
             elif "sow" in user_input or "plant" in user_input:
-                for crop in df["Crops"].unique():
-                    if crop.lower() in user_input:
-                        season = df[df["Crops"] == crop]["Season"].mode().values[0]
-                        st.success(f"🗓️ Sow **{crop}** during the **{season}** season.")
-                        break
+                crop = crop_matcher(data_mtime).find(user_input, "crop")
+                if crop:
+                    season = profiles.loc[crop, "Season_mode"]
+                    st.success(f"🗓️ Sow **{crop}** during the **{season}** season.")
                 else:
                     st.warning("🤷 Sorry, couldn't find sowing info for that crop.")
             elif "condition" in user_input or "grow" in user_input:
-                for crop in df["Crops"].unique():
-                    if crop.lower() in user_input:
-                        row = df[df["Crops"] == crop]
-                        st.success(
-                            f"🌡️ Ideal Temp: {row['Temperature'].mean():.1f}°C\n"
-                            f"🌧️ Rainfall: {row['Rainfall'].mean():.1f} mm\n"
-                            f"💧 Humidity: {row['Humidity'].mean():.1f}%"
-                        )
-                        break
+                crop = crop_matcher(data_mtime).find(user_input, "crop")
+                if crop:
+                    row = profiles.loc[crop]
+                    st.success(
+                        f"🌡️ Ideal Temp: {row['Temperature_mean']:.1f}°C\n"
+                        f"🌧️ Rainfall: {row['Rainfall_mean']:.1f} mm\n"
+                        f"💧 Humidity: {row['Humidity_mean']:.1f}%"
+                    )
                 else:
                     st.warning("No ideal conditions found for that crop.")
             else:
@@ -0,0 +1,37 @@
+# test_yield_cube.py
+"""Incremental CubeStore appends must match a full rebuild, dtypes included.
+
+Usage:
+    python -m pytest test_yield_cube.py
+"""
+import pandas as pd
+
+from yield_cube import CubeStore
+
+HEADER = "Location,Irrigation,yeilds,Crops,price,Season\n"
+FIRST = [
+    "Mangalore,Drip,2570,Coconut,200000,Kharif\n",
+    "Mangalore,Drip,27170,Coconut,4847,Kharif\n",
+    "Mysore,Canal,900,Rice,1500,Rabi\n",
+]
+APPENDED = [
+    "Mangalore,Drip,3100,Coconut,5000,Kharif\n",
+    "Kolar,Basin,1200,Ragi,2100,Kharif\n",
+]
+
+
+def test_append_keeps_integer_counts(tmp_path):
+    path = tmp_path / "season.csv"
+    path.write_text(HEADER + "".join(FIRST))
+    store = CubeStore(str(path))
+    before = store.refresh().cells.dtypes
+
+    with open(path, "a") as f:
+        f.writelines(APPENDED)
+    cells = store.refresh().cells
+    rebuilt = CubeStore(str(path)).refresh().cells
+
+    assert cells.dtypes.equals(before)
+    for column in ["Yeilds_count", "Price_count", "Rows"]:
+        assert pd.api.types.is_integer_dtype(cells[column])
+    pd.testing.assert_frame_equal(cells.sort_index(), rebuilt.sort_index())
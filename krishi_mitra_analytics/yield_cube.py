@@ -0,0 +1,137 @@
+# yield_cube.py
+"""Pre-aggregated OLAP cube of yield and price for the dashboard filters.
+
+Each cell holds the sum and count of Yeilds and Price for one observed
+(Season, Crops, Location, Irrigation) combination. Any multiselect filter
+is answered by summing the matching cells, so the work per rerun grows
+with the number of combinations instead of the number of rows.
+"""
+import hashlib
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ["Season", "Crops", "Location", "Irrigation"]
+MEASURES = ["Yeilds", "Price"]
+
+
+def aggregate_cells(data):
+    """Aggregate raw rows into cube cells indexed by DIMENSIONS"""
+    grouped = data.groupby(DIMENSIONS, dropna=False, sort=False)
+    cells = grouped[MEASURES].agg(["sum", "count"])
+    cells.columns = [f"{measure}_{stat}" for measure, stat in cells.columns]
+    cells["Rows"] = grouped.size()
+    return cells
+
+
+class YieldCube:
+    """Sum/count cells over the dashboard dimensions"""
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    @classmethod
+    def from_frame(cls, data):
+        return cls(aggregate_cells(data))
+
+    def append(self, rows):
+        """Fold newly appended raw rows into the existing cells"""
+        new_cells = aggregate_cells(rows)
+        # The outer-join add goes through float64; keep counts (and integer sums) integral like a rebuild
+        dtypes = {column: np.result_type(self.cells[column].dtype, new_cells[column].dtype)
+                  for column in self.cells.columns}
+        self.cells = self.cells.add(new_cells, fill_value=0).astype(dtypes)
+
+    def select(self, seasons, crops, locations):
+        """Return the cells matching a season/crop/location filter"""
+        index = self.cells.index
+        mask = (
+            index.get_level_values("Season").isin(seasons) &
+            index.get_level_values("Crops").isin(crops) &
+            index.get_level_values("Location").isin(locations)
+        )
+        return self.cells[mask]
+
+    def rollup(self, by, seasons, crops, locations):
+        """Totals and means of every measure grouped by one or more dimensions"""
+        totals = self.select(seasons, crops, locations).groupby(level=by).sum()
+        for measure in MEASURES:
+            totals[f"{measure}_mean"] = totals[f"{measure}_sum"] / totals[f"{measure}_count"]
+        return totals
+
+
+class CubeStore:
+    """Keeps a YieldCube in sync with an append-only CSV file
+
+    New rows at the end of the file are parsed and folded into the cube on
+    refresh(). The cube is rebuilt from scratch when the file was replaced
+    (new inode), shrank, or had any of its already-read bytes changed, which
+    is detected by a SHA-256 of the consumed prefix.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.cube = None
+        self._lock = threading.Lock()
+        self._columns = None
+        self._offset = 0
+        self._prefix = None
+        self._stamp = None
+
+    def refresh(self):
+        """Bring the cube up to date with the file and return it"""
+        stat = os.stat(self.path)
+        stamp = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if self.cube is not None and stamp == self._stamp:
+                return self.cube
+
+            with open(self.path, "rb") as f:
+                same_file = self.cube is not None and stamp[:2] == self._stamp[:2] and stat.st_size >= self._offset
+                if not (same_file and self._prefix_unchanged(f)):
+                    f.seek(0)
+                    self._rebuild(f)
+                else:
+                    self._read_appended(f)
+            self._stamp = stamp
+            return self.cube
+
+    def _prefix_unchanged(self, f):
+        # Hashing is far cheaper than parsing, and leaves f positioned at the old offset
+        digest = hashlib.sha256()
+        remaining = self._offset
+        while remaining:
+            block = f.read(min(remaining, 1 << 20))
+            if not block:
+                return False
+            digest.update(block)
+            remaining -= len(block)
+        return digest.digest() == self._prefix.digest()
+
+    def _consume(self, f):
+        # Only consume complete lines; a partially written last row is picked up next time
+        chunk = f.read()
+        chunk = chunk[:chunk.rfind(b"\n") + 1]
+        self._offset += len(chunk)
+        self._prefix.update(chunk)
+        return chunk
+
+    def _rebuild(self, f):
+        header = f.readline()
+        self._columns = pd.Index(header.decode().strip().split(",")).str.strip().str.capitalize()
+        self._offset = len(header)
+        self._prefix = hashlib.sha256(header)
+        self.cube = YieldCube.from_frame(self._parse(self._consume(f)))
+
+    def _read_appended(self, f):
+        rows = self._parse(self._consume(f))
+        if not rows.empty:
+            self.cube.append(rows)
+
+    def _parse(self, chunk):
+        if not chunk.strip():
+            return pd.DataFrame(columns=self._columns)
+        return pd.read_csv(io.BytesIO(chunk), header=None, names=self._columns)
@@ -1,87 +1,148 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import joblib
 import pandas as pd
 
-# Load models and encoders
-crop_recommendation_model = joblib.load("crop_recommendation_model.pkl")
-crop_rotation_model = joblib.load("crop_rotation_model.pkl")
-crop_encoder = joblib.load("crop_encoder.pkl")
-
-# Load dataset for location & season prediction
-crop_data = pd.read_csv("crop_data.csv")
-
-# Crop rotation explanation rules
-rotation_explanations = {
-    ('rice', 'chickpea'): "Rice depletes nitrogen heavily. Chickpea, a legume, helps restore soil nitrogen.",
-    ('rice', 'lentil'): "Rice exhausts nitrogen. Lentil is nitrogen-fixing and ideal for soil recovery.",
-    ('maize', 'soybean'): "Maize consumes nutrients. Soybean replenishes soil with nitrogen.",
-    ('wheat', 'blackgram'): "Blackgram improves soil texture and fixes nitrogen post wheat.",
-    ('wheat', 'sunflower'): "Sunflower helps disrupt wheat disease cycles and balances nutrients.",
-    ('cotton', 'pearl millet'): "Cotton attracts pests. Millet rotation reduces pest buildup.",
-    ('banana', 'pigeonpeas'): "Pigeonpeas help restore nitrogen post banana farming.",
-    'default': "This crop rotation maintains soil health and improves biodiversity."
-}
+import coalescer
+import inference
+import model_registry
+import prediction_cache
+from rotation import ROTATION_FEATURES
+from state import load_location_indexes, location_key, lookup_crops
+
+# Models and encoders are loaded lazily (and memory-mapped) by the registry
+# CROP_MODEL_BACKEND=flat|compact picks the recommendation artifact (see model_registry)
+RECOMMENDATION_MODEL = model_registry.RECOMMENDATION_MODEL
+
+# Load before a pre-fork server (gunicorn --preload) forks, so workers share the pages
+if model_registry.PRELOAD:
+    model_registry.preload()
+
+# (state, district, season) -> sorted crops, built once so lookups don't scan the frame,
+# and their most common crops with each one's share of the records
+crop_index, top_crop_index = load_location_indexes("crop_data.csv")
+
+# Prediction logic lives in inference.py so asgi_app.py serves the same answers
+FEATURES = inference.FEATURES
+
+# Number of result lines sent per chunk by the batch endpoint
+BATCH_CHUNK_SIZE = 500
+
+# With COALESCE_WINDOW_MS > 0, concurrent single-record predictions share one model call
+batchers = {
+    "predict-crop": coalescer.MicroBatcher(inference.recommend_crops),
+    "predict-next-crop": coalescer.MicroBatcher(inference.next_crops),
+} if coalescer.ENABLED else {}
+
+# With PREDICTION_CACHE_SIZE > 0, repeated inputs are answered without running the model
+caches = {
+    "predict-crop": prediction_cache.PredictionCache([RECOMMENDATION_MODEL], FEATURES),
+    "predict-next-crop": prediction_cache.PredictionCache(["crop_rotation", "crop_encoder"], ROTATION_FEATURES),
+} if prediction_cache.ENABLED else {}
+
+def recommend(features):
+    if batchers:
+        return batchers["predict-crop"].predict(features)
+    return inference.recommend_crop(features)
+
+def predict_rotation(features):
+    if batchers:
+        return batchers["predict-next-crop"].predict(features)
+    return inference.next_crops(features)[0]
 
 app = Flask(__name__)
 CORS(app)
 
+def read_batch_features():
+    """Read a JSON array or a CSV upload of soil records into a feature matrix"""
+    upload = request.files.get('file')
+    if upload is not None:
+        return inference.records_features(pd.read_csv(upload))
+    if request.mimetype == 'text/csv':
+        return inference.payload_features(csv_bytes=request.get_data())
+    return inference.payload_features(request.get_json(silent=True))
+
 @app.route('/predict-crop', methods=['POST'])
 def predict_crop():
     data = request.json
-    features = [
-        data['N'], data['P'], data['K'],
-        data['temperature'], data['humidity'],
-        data['ph'], data['rainfall']
-    ]
-    prediction = crop_recommendation_model.predict([features])[0]
+    features = inference.soil_features(data)
+    if caches:
+        prediction = caches["predict-crop"].predict(features, recommend)
+    else:
+        prediction = recommend(features)
     return jsonify({"recommended_crop": prediction})
 
+@app.route('/predict-crop/batch', methods=['POST'])
+def predict_crop_batch():
+    try:
+        features = read_batch_features()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # One vectorized call for the whole batch instead of one per record
+    crops, confidence = inference.recommend_batch(features)
+
+    # Stream newline-delimited JSON so large cooperatives don't wait for the full body
+    return Response(inference.batch_lines(crops, confidence, BATCH_CHUNK_SIZE), mimetype='application/x-ndjson')
+
 @app.route('/predict-by-location', methods=['POST'])
 def predict_by_location():
     data = request.json
-    state = data['state'].lower()
-    district = data['district'].lower()
-    season = data['season'].lower()
-
-    filtered = crop_data[
-        (crop_data['State'].str.lower() == state) &
-        (crop_data['District'].str.lower() == district) &
-        (crop_data['Season'].str.lower() == season)
-    ]
+    crops = lookup_crops(crop_index, data['state'], data['district'], data['season'])
 
-    if filtered.empty:
+    if not crops:
         return jsonify({"message": "No crops found for the given criteria."})
 
-    crops = filtered['Crop'].unique().tolist()
-    return jsonify({"crops": crops})
+    top = top_crop_index.get(location_key(data['state'], data['district'], data['season']), [])
+    return jsonify({
+        "crops": crops,
+        "top_crops": [{"crop": crop, "share": round(share, 4)} for crop, share in top],
+    })
 
 @app.route('/predict-next-crop', methods=['POST'])
 def predict_next_crop():
     data = request.json
     current_crop = data['current_crop']
-    features = [
-        data['N'], data['P'], data['K'],
-        data['temperature'], data['humidity'],
-        data['ph'], data['rainfall']
-    ]
-    encoded_crop = crop_encoder.transform([current_crop])[0]
-    features.append(encoded_crop)
-
-    df_input = pd.DataFrame([features], columns=[
-        'N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'current_crop'])
-    predicted_crop = crop_rotation_model.predict(df_input)[0]
-
-    explanation = rotation_explanations.get(
-        (current_crop, predicted_crop),
-        rotation_explanations['default']
-    )
+
+    # Precomputed crop codes and column order; one NumPy row, no DataFrame
+    try:
+        features = inference.rotation_features(data, current_crop)
+    except inference.UnknownCropError as e:
+        return jsonify({"error": str(e), "known_crops": e.known_crops}), 400
+
+    if caches:
+        predicted_crop = str(caches["predict-next-crop"].predict(features, predict_rotation))
+    else:
+        predicted_crop = str(predict_rotation(features))
 
     return jsonify({
         "current_crop": current_crop,
         "recommended_next_crop": predicted_crop,
-        "reason": explanation
+        "reason": inference.rotation_reason(current_crop, predicted_crop)
+    })
+
+@app.route('/models/status', methods=['GET'])
+def models_status():
+    return jsonify({
+        name: {
+            "loaded": model_registry.is_loaded(name),
+            "load_seconds": model_registry.load_timings().get(name)
+        }
+        for name in model_registry.MODEL_FILES
+    })
+
+@app.route('/metrics/coalescer', methods=['GET'])
+def coalescer_metrics():
+    return jsonify({
+        "enabled": coalescer.ENABLED,
+        "routes": {route: batcher.metrics() for route, batcher in batchers.items()}
+    })
+
+@app.route('/metrics/prediction-cache', methods=['GET'])
+def prediction_cache_metrics():
+    return jsonify({
+        "enabled": prediction_cache.ENABLED,
+        "routes": {route: cache.stats() for route, cache in caches.items()}
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,162 @@
+# asgi_app.py
+"""Async serving mode for the prediction API.
+
+Serves the same routes and responses as app.py on Quart. Requests are
+parsed on an event loop, and every model call (including parsing a batch
+body) goes to a process pool whose workers load the models once at
+start-up (inference.init_worker). A long batch occupies one worker while
+the loop keeps answering /predict-by-location from memory.
+
+Backpressure: at most INFERENCE_MAX_PENDING model calls are in flight or
+queued for the pool; beyond that requests get 503 with Retry-After
+instead of piling up. A call that takes longer than INFERENCE_TIMEOUT
+seconds gets 504. Its worker still finishes the job, and the job keeps
+its slot until then, so timed-out work still counts as load.
+
+Run it in the server's main process (the hypercorn CLI runs apps in
+daemonic workers, which may not start a process pool):
+
+Usage:
+    python asgi_app.py
+    uvicorn asgi_app:app --port 5000
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+
+import inference
+from state import load_location_indexes, location_key, lookup_crops
+
+# Worker processes running model calls
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", os.cpu_count() or 1))
+
+# Model calls allowed in flight or waiting for a worker before new ones are refused with 503
+INFERENCE_MAX_PENDING = int(os.environ.get("INFERENCE_MAX_PENDING", 4 * INFERENCE_WORKERS))
+
+# Seconds a request waits for its model call before answering 504
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", "10"))
+
+# Number of result lines sent per chunk by the batch endpoint
+BATCH_CHUNK_SIZE = 500
+
+crop_index, top_crop_index = load_location_indexes("crop_data.csv")
+
+app = cors(Quart(__name__))
+
+pool = None
+counters = {"pending": 0, "completed": 0, "rejected": 0, "timed_out": 0}
+
+
+class Overloaded(Exception):
+    """Every inference slot is taken"""
+
+
+@app.before_serving
+async def start_pool():
+    global pool
+    pool = ProcessPoolExecutor(INFERENCE_WORKERS, initializer=inference.init_worker)
+
+
+@app.after_serving
+async def stop_pool():
+    pool.shutdown(cancel_futures=True)
+
+
+def _finished(_):
+    counters["pending"] -= 1
+    counters["completed"] += 1
+
+
+async def offload(function, *args):
+    """Run function(*args) in the process pool; raises Overloaded or asyncio.TimeoutError"""
+    # Only the event loop thread touches the counters, so check-and-increment can't race
+    if counters["pending"] >= INFERENCE_MAX_PENDING:
+        counters["rejected"] += 1
+        raise Overloaded()
+    counters["pending"] += 1
+    job = asyncio.get_running_loop().run_in_executor(pool, function, *args)
+    # The slot is freed when the worker is done, not when the caller stops waiting
+    job.add_done_callback(_finished)
+    try:
+        return await asyncio.wait_for(asyncio.shield(job), INFERENCE_TIMEOUT)
+    except asyncio.TimeoutError:
+        counters["timed_out"] += 1
+        raise
+
+
+@app.errorhandler(Overloaded)
+async def overloaded(_):
+    return jsonify({"error": "Server is busy, retry shortly."}), 503, {"Retry-After": "1"}
+
+
+@app.errorhandler(asyncio.TimeoutError)
+async def timed_out(_):
+    return jsonify({"error": f"Prediction took longer than {INFERENCE_TIMEOUT:g} s."}), 504
+
+
+@app.route('/predict-crop', methods=['POST'])
+async def predict_crop():
+    data = await request.get_json()
+    prediction = await offload(inference.recommend_crop, inference.soil_features(data))
+    return jsonify({"recommended_crop": prediction})
+
+
+@app.route('/predict-crop/batch', methods=['POST'])
+async def predict_crop_batch():
+    upload = (await request.files).get('file')
+    if upload is not None:
+        job = (None, upload.read())
+    elif request.mimetype == 'text/csv':
+        job = (None, await request.get_data())
+    else:
+        job = (await request.get_json(silent=True), None)
+
+    try:
+        crops, confidence = await offload(inference.recommend_payload, *job)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Stream newline-delimited JSON so large cooperatives don't wait for the full body
+    return Response(inference.batch_lines(crops, confidence, BATCH_CHUNK_SIZE), mimetype='application/x-ndjson')
+
+
+@app.route('/predict-by-location', methods=['POST'])
+async def predict_by_location():
+    # Dictionary lookups; cheap enough to answer on the event loop
+    data = await request.get_json()
+    crops = lookup_crops(crop_index, data['state'], data['district'], data['season'])
+
+    if not crops:
+        return jsonify({"message": "No crops found for the given criteria."})
+
+    top = top_crop_index.get(location_key(data['state'], data['district'], data['season']), [])
+    return jsonify({
+        "crops": crops,
+        "top_crops": [{"crop": crop, "share": round(share, 4)} for crop, share in top],
+    })
+
+
+@app.route('/predict-next-crop', methods=['POST'])
+async def predict_next_crop():
+    data = await request.get_json()
+    try:
+        return jsonify(await offload(inference.next_crop, data, data['current_crop']))
+    except inference.UnknownCropError as e:
+        return jsonify({"error": str(e), "known_crops": e.known_crops}), 400
+
+
+@app.route('/metrics/inference', methods=['GET'])
+async def inference_metrics():
+    return jsonify({
+        "workers": INFERENCE_WORKERS,
+        "max_pending": INFERENCE_MAX_PENDING,
+        "timeout_seconds": INFERENCE_TIMEOUT,
+        **counters,
+    })
+
+
+if __name__ == '__main__':
+    app.run()
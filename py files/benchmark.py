@@ -0,0 +1,303 @@
+# benchmark.py
+"""HTTP load benchmark for the prediction API.
+
+Starts app.py (or asgi_app.py with --server asgi) on a free local port
+and replays a seeded mix of /predict-crop, /predict-by-location and
+/predict-next-crop requests built from Crop_recommendation.csv and
+crop_data.csv at each concurrency level. For every level it reports
+p50/p95/p99 latency, requests/s, errors and the resident memory of the
+server and its worker processes, overall and per route, as JSON.
+
+With --compare the run is checked against an earlier result file and
+the script exits with status 1 when a metric got worse by more than
+--threshold (p95 latency and throughput by default) or when the error
+rate went up at all, so it can gate a model retrain or a serving change.
+
+Usage:
+    python benchmark.py [--server flask|asgi] [--concurrency 1,4,16] [--requests 500]
+                        [--mix predict-crop=0.5,predict-by-location=0.3,predict-next-crop=0.2]
+                        [--output benchmark.json] [--compare baseline.json] [--threshold 0.1]
+    python benchmark.py --current benchmark.json --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from datastore import load_table
+from inference import FEATURES
+
+SERVERS = {
+    "flask": ["-m", "flask", "--app", "app", "run", "--no-reload", "--no-debugger", "--port", "{port}"],
+    "asgi": ["-m", "uvicorn", "asgi_app:app", "--log-level", "warning", "--port", "{port}"],
+}
+
+DEFAULT_MIX = "predict-crop=0.5,predict-by-location=0.3,predict-next-crop=0.2"
+
+# Metrics where a larger value is worse; the others (rps) regress when they shrink
+LOWER_IS_BETTER = {"p50_ms", "p95_ms", "p99_ms", "errors"}
+
+# Seconds to wait for the server to build its indexes and start listening
+STARTUP_TIMEOUT = 300
+
+
+def parse_mix(spec):
+    """{"predict-crop": 0.5, ...} from "predict-crop=0.5,...", normalized to sum to 1"""
+    weights = {}
+    for item in spec.split(","):
+        route, weight = item.split("=")
+        weights[route.strip()] = float(weight)
+    total = sum(weights.values())
+    return {route: weight / total for route, weight in weights.items()}
+
+
+def build_requests(count, mix, seed):
+    """A reproducible list of (route, payload) pairs drawn from the two datasets"""
+    rng = np.random.default_rng(seed)
+    soil = load_table("Crop_recommendation.csv")
+    locations = load_table("crop_data.csv", columns=["State", "District", "Season"]).dropna()
+    soil_rows = soil[FEATURES].to_dict("records")
+    crops = soil["label"].astype(str).tolist()
+    location_rows = locations.astype(str).to_numpy().tolist()
+
+    routes = rng.choice(list(mix), size=count, p=list(mix.values()))
+    requests = []
+    for route in routes:
+        if route == "predict-by-location":
+            state, district, season = location_rows[rng.integers(len(location_rows))]
+            payload = {"state": state, "district": district, "season": season}
+        else:
+            i = int(rng.integers(len(soil_rows)))
+            payload = {column: float(value) for column, value in soil_rows[i].items()}
+            if route == "predict-next-crop":
+                payload["current_crop"] = crops[i]
+        requests.append((str(route), json.dumps(payload).encode()))
+    return requests
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(kind, port, log):
+    command = [sys.executable] + [part.format(port=port) for part in SERVERS[kind]]
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), stdout=log, stderr=log)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"❌ {kind} server exited with status {server.returncode}; see {log.name}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.5)
+    server.kill()
+    raise SystemExit(f"❌ {kind} server did not start within {STARTUP_TIMEOUT} s; see {log.name}")
+
+
+def process_tree(pid):
+    """pid and every descendant process id, read from /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def memory_mb(pid):
+    """Current and peak resident memory (MB) of a server and its workers, or None without /proc"""
+    if not os.path.isdir("/proc"):
+        return None
+    totals = {"rss_mb": 0.0, "peak_rss_mb": 0.0}
+    for process in process_tree(pid):
+        try:
+            with open(f"/proc/{process}/status") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        totals["rss_mb"] += int(status.get("VmRSS", "0 kB").split()[0]) / 1024
+        totals["peak_rss_mb"] += int(status.get("VmHWM", "0 kB").split()[0]) / 1024
+    return {key: round(value, 1) for key, value in totals.items()}
+
+
+def send(base_url, route, body):
+    """Latency in seconds of one request and whether it succeeded"""
+    call = urllib.request.Request(f"{base_url}/{route}", data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(call, timeout=60) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def summarize(latencies, failures, seconds):
+    latencies = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": int(failures),
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+def run_level(base_url, requests, concurrency):
+    """Send every request with the given number of concurrent clients"""
+    with ThreadPoolExecutor(concurrency) as clients:
+        start = time.perf_counter()
+        results = list(clients.map(lambda item: send(base_url, *item), requests))
+        seconds = time.perf_counter() - start
+
+    latencies = np.array([latency for latency, _ in results])
+    ok = np.array([success for _, success in results])
+    routes = np.array([route for route, _ in requests])
+    summary = summarize(latencies, (~ok).sum(), seconds)
+    summary["routes"] = {
+        route: summarize(latencies[routes == route], (~ok[routes == route]).sum(), seconds)
+        for route in sorted(set(routes))
+    }
+    return summary
+
+
+def benchmark(args):
+    mix = parse_mix(args.mix)
+    requests = build_requests(args.requests, mix, args.seed)
+    warmup = build_requests(args.warmup, mix, args.seed + 1)
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    with open(args.log, "w") as log:
+        server = start_server(args.server, port, log)
+        try:
+            print(f"⏱️ Warming up with {len(warmup)} requests")
+            run_level(base_url, warmup, 1)
+            levels = {}
+            for concurrency in args.concurrency:
+                levels[str(concurrency)] = run_level(base_url, requests, concurrency)
+                memory = memory_mb(server.pid)
+                if memory:
+                    levels[str(concurrency)].update(memory)
+                print_level(concurrency, levels[str(concurrency)])
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {
+        "meta": {
+            "server": args.server,
+            "requests": args.requests,
+            "mix": mix,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            # Serving switches that change the numbers
+            "environment": {key: value for key, value in os.environ.items()
+                            if key.startswith(("COALESCE_", "PREDICTION_CACHE_", "INFERENCE_", "CROP_", "MODEL_"))},
+        },
+        "levels": levels,
+    }
+
+
+def print_level(concurrency, level):
+    memory = f", RSS {level['rss_mb']:.0f} MB" if "rss_mb" in level else ""
+    print(f"📊 concurrency {concurrency}: {level['rps']} req/s, p50 {level['p50_ms']} ms, "
+          f"p95 {level['p95_ms']} ms, p99 {level['p99_ms']} ms, {level['errors']} errors{memory}")
+
+
+def error_rate(level):
+    """Share of a level's requests that failed"""
+    return level["errors"] / level["requests"] if level.get("requests") else 0.0
+
+
+def compare(current, baseline, metrics, threshold):
+    """Regressions beyond threshold (a fraction) for every level present in both results
+
+    Any rise in the error rate is a regression, whatever the metrics and threshold.
+    """
+    regressions = []
+    for concurrency, level in current["levels"].items():
+        before = baseline["levels"].get(concurrency)
+        if before is None:
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), level.get(metric)
+            if old is None or new is None:
+                continue
+            if metric in LOWER_IS_BETTER:
+                worse = new > old * (1 + threshold) if old else new > old
+            else:
+                worse = new < old * (1 - threshold)
+            if worse:
+                regressions.append(f"concurrency {concurrency}: {metric} {old} -> {new}")
+        # Failed requests also finish fast, so latency and throughput can look better while errors climb
+        if error_rate(level) > error_rate(before):
+            regressions.append(f"concurrency {concurrency}: errors {before['errors']}/{before['requests']} "
+                               f"-> {level['errors']}/{level['requests']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the prediction API at fixed concurrency levels.")
+    parser.add_argument("--server", choices=sorted(SERVERS), default="flask")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=500, help="requests sent per concurrency level")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight pairs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--log", default="benchmark_server.log", help="server stdout/stderr")
+    parser.add_argument("--current", help="compare this existing result instead of running the benchmark")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail when worse than this earlier result")
+    parser.add_argument("--metrics", default="p95_ms,rps", help="metrics checked by --compare")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative change, e.g. 0.1 for 10%%")
+    args = parser.parse_args()
+    args.concurrency = [int(n) for n in args.concurrency.split(",") if n]
+
+    if args.current:
+        with open(args.current) as f:
+            result = json.load(f)
+    else:
+        result = benchmark(args)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=1)
+        print(f"💾 Saved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.metrics.split(","), args.threshold)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"✅ No regression beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
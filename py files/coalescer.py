@@ -0,0 +1,110 @@
+# coalescer.py
+"""Server-side micro-batching for single-record prediction routes.
+
+Each request thread hands its feature row to a MicroBatcher and waits on
+a future. One background thread takes the first waiting row, keeps
+collecting rows for up to COALESCE_WINDOW_MS (or until COALESCE_MAX_BATCH
+rows), runs a single vectorized predict over the stacked matrix and
+hands every caller its own result. Clients don't change; under
+concurrent load many predict() calls become one.
+
+Enabled in app.py when COALESCE_WINDOW_MS is set above 0.
+"""
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+# How long the first request of a batch waits for company, in milliseconds (0 disables coalescing)
+WINDOW_MS = float(os.environ.get("COALESCE_WINDOW_MS", "0"))
+
+# Largest number of rows predicted in one call
+MAX_BATCH = int(os.environ.get("COALESCE_MAX_BATCH", "64"))
+
+ENABLED = WINDOW_MS > 0
+
+
+class MicroBatcher:
+    """Coalesces concurrent one-row predictions into batched predict_batch(rows) calls"""
+
+    def __init__(self, predict_batch, window_ms=WINDOW_MS, max_batch=MAX_BATCH):
+        self.predict_batch = predict_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._requests = 0
+        self._batches = 0
+        self._wait_seconds = 0.0
+        self._max_queue_depth = 0
+        self._batch_sizes = Counter()
+
+    def submit(self, row):
+        """Queue one feature row; the returned future resolves to its prediction"""
+        # Convert here so a malformed row fails its own request, not the whole batch
+        row = np.asarray(row, dtype=np.float64).reshape(-1)
+        future = Future()
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+            self._queue.put((row, future, time.perf_counter()))
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return future
+
+    def predict(self, row, timeout=None):
+        """Prediction for one row, computed together with whatever arrives alongside it"""
+        return self.submit(row).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                results = self.predict_batch(np.vstack([row for row, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            with self._lock:
+                self._requests += len(batch)
+                self._batches += 1
+                self._batch_sizes[len(batch)] += 1
+                self._wait_seconds += sum(started - queued for _, _, queued in batch)
+
+    def metrics(self):
+        """Queue depth and batch-size statistics since start-up"""
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._requests,
+                "batches": self._batches,
+                "mean_batch_size": round(self._requests / self._batches, 2) if self._batches else None,
+                "max_batch_size": max(self._batch_sizes, default=None),
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "mean_wait_ms": round(self._wait_seconds / self._requests * 1000, 3) if self._requests else None,
+                "window_ms": self.window * 1000,
+                "max_batch": self.max_batch,
+            }
@@ -0,0 +1,170 @@
+# compress_model.py
+"""Shrink the crop recommendation forest and report what each option costs.
+
+Variants compared against the served crop_recommendation_model.pkl:
+  flat       the compiled flat forest (float32 thresholds, exact predictions)
+  subset-K   the first K trees of the current forest, no retraining
+  capped     a forest refit with fewer trees and a depth cap
+  distilled  one decision tree trained to imitate the forest on the
+             training rows plus jittered copies of them
+
+For every variant the report lists test accuracy, agreement with the
+current model, one-record and batch latency, load time and artifact
+size. --save writes the chosen variant (any but flat, which already has
+its own artifact) to crop_recommendation_compact.pkl, a plain
+scikit-learn estimator that app.py, modelstream.py and naturalpredict.py
+serve with CROP_MODEL_BACKEND=compact.
+
+Usage:
+    python compress_model.py [--subsets 10,25,50] [--trees 30] [--max-depth 12]
+                             [--tree-depth 14] [--report compression_report.json] [--save VARIANT]
+"""
+import argparse
+import copy
+import json
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+import model_registry
+from datastore import load_table
+from flat_forest import export_forest
+
+COMPACT_MODEL_FILE = model_registry.MODEL_FILES["crop_recommendation_compact"]
+
+# Jittered copies of each training row used to teach the distilled tree
+DISTILL_COPIES = 20
+
+# Single-record predictions timed per variant
+LATENCY_REPEATS = 50
+
+
+def tree_subset(forest, n_trees):
+    """The forest cut down to its first n_trees trees (random forest trees are interchangeable)"""
+    subset = copy.deepcopy(forest)
+    subset.estimators_ = subset.estimators_[:n_trees]
+    subset.n_estimators = len(subset.estimators_)
+    return subset
+
+
+def capped_forest(X, y, n_trees, max_depth):
+    """A forest refit with fewer, shallower trees"""
+    return RandomForestClassifier(n_estimators=n_trees, max_depth=max_depth, random_state=42).fit(X, y)
+
+
+def distilled_tree(teacher, X, max_depth, copies=DISTILL_COPIES, seed=42):
+    """A single tree fit to the teacher's predictions on X and jittered copies of X"""
+    rng = np.random.default_rng(seed)
+    values = X.to_numpy(dtype=np.float64)
+    noise = rng.normal(scale=0.05, size=(copies,) + values.shape) * values.std(axis=0)
+    samples = np.concatenate([values[np.newaxis], values[np.newaxis] + noise]).reshape(-1, values.shape[1])
+    samples = pd.DataFrame(samples, columns=X.columns)
+    labels = teacher.predict(samples)
+    return DecisionTreeClassifier(max_depth=max_depth, random_state=seed).fit(samples, labels)
+
+
+def artifact_stats(model):
+    """Size in bytes and load time in seconds of the model saved as the registry saves it"""
+    fd, path = tempfile.mkstemp(suffix=".pkl")
+    os.close(fd)
+    try:
+        joblib.dump(model, path)
+        start = time.perf_counter()
+        joblib.load(path, mmap_mode=model_registry.MMAP_MODE)
+        return os.path.getsize(path), time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+
+def latency_ms(model, X, repeats=LATENCY_REPEATS):
+    """Median one-record predict time and the time of one predict over all of X"""
+    row = X.iloc[:1]
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.predict(X)
+    return float(np.median(timings)) * 1000, (time.perf_counter() - start) * 1000
+
+
+def measure(model, reference, X_test, y_test):
+    """Accuracy, agreement with the reference predictions, latency and size of one variant"""
+    predictions = np.asarray(model.predict(X_test)).astype(str)
+    single_ms, batch_ms = latency_ms(model, X_test)
+    size, load_seconds = artifact_stats(model)
+    return {
+        "accuracy": round(float((predictions == y_test).mean()), 4),
+        "agreement": round(float((predictions == reference).mean()), 4),
+        "single_ms": round(single_ms, 3),
+        "batch_ms": round(batch_ms, 2),
+        "load_ms": round(load_seconds * 1000, 2),
+        "size_bytes": size,
+    }
+
+
+def build_variants(forest, X_train, y_train, args):
+    """Every compressed candidate, keyed by variant name"""
+    variants = {"current": forest, "flat": export_forest(forest)}
+    for n_trees in args.subsets:
+        if n_trees < len(forest.estimators_):
+            variants[f"subset-{n_trees}"] = tree_subset(forest, n_trees)
+    variants["capped"] = capped_forest(X_train, y_train, args.trees, args.max_depth)
+    variants["distilled"] = distilled_tree(forest, X_train, args.tree_depth)
+    return variants
+
+
+def print_report(report):
+    baseline = report["current"]
+    print(f"{'variant':<12}{'accuracy':>10}{'agree':>8}{'1-row ms':>10}{'batch ms':>10}{'load ms':>9}{'size KB':>9}{'smaller':>9}")
+    for name, row in report.items():
+        print(f"{name:<12}{row['accuracy']:>10.4f}{row['agreement']:>8.4f}{row['single_ms']:>10.3f}"
+              f"{row['batch_ms']:>10.2f}{row['load_ms']:>9.2f}{row['size_bytes'] / 1024:>9.0f}"
+              f"{baseline['size_bytes'] / row['size_bytes']:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress the crop recommendation model and compare the options.")
+    parser.add_argument("--model", default=model_registry.MODEL_FILES["crop_recommendation"])
+    parser.add_argument("--subsets", default="10,25,50", help="tree counts for the subset-K variants")
+    parser.add_argument("--trees", type=int, default=30, help="trees in the capped forest")
+    parser.add_argument("--max-depth", type=int, default=12, help="depth cap of the capped forest")
+    parser.add_argument("--tree-depth", type=int, default=14, help="depth cap of the distilled tree")
+    parser.add_argument("--report", help="also write the report as JSON")
+    parser.add_argument("--save", metavar="VARIANT", help=f"write this variant to {COMPACT_MODEL_FILE}")
+    args = parser.parse_args()
+    args.subsets = [int(n) for n in args.subsets.split(",") if n]
+
+    # Same split as train.py, so the test rows were never seen by the current model
+    df = load_table("Crop_recommendation.csv")
+    X = df.drop("label", axis=1)
+    y = df["label"].to_numpy().astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    forest = joblib.load(args.model)
+    variants = build_variants(forest, X_train, y_train, args)
+    reference = np.asarray(forest.predict(X_test)).astype(str)
+    report = {name: measure(model, reference, X_test, y_test) for name, model in variants.items()}
+    print_report(report)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=1)
+
+    if args.save:
+        if args.save not in variants or args.save == "flat":
+            parser.error(f"--save takes one of: {', '.join(name for name in variants if name != 'flat')}")
+        model_registry.save_model(variants[args.save], COMPACT_MODEL_FILE)
+        print(f"💾 Saved '{args.save}' to {COMPACT_MODEL_FILE}; serve it with CROP_MODEL_BACKEND=compact")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# crop_aggregates.py
+"""Vectorized "most common crop" aggregations over crop_data.csv.
+
+One groupby-size pass counts every (location, crop) pair; a stable sort
+and a cumulative count then rank crops inside each location. This
+replaces per-group value_counts() lambdas and gives the map scripts, the
+pie charts and the location endpoints the same top-k numbers. Counting
+and ranking are separate steps so counts gathered chunk by chunk (see
+stream_ingest.py) rank exactly like counts from the whole frame.
+"""
+
+LOCATION_KEYS = ["State", "District"]
+
+
+def crop_counts(df, keys=LOCATION_KEYS, crop="Crop"):
+    """Rows per (location, crop) pair as columns keys + [crop, "count"], in first-appearance order"""
+    data = df.dropna(subset=[crop])
+    return data.groupby(list(keys) + [crop], sort=False, observed=True).size().reset_index(name="count")
+
+
+def rank_crops(counts, keys=LOCATION_KEYS, crop="Crop", k=1):
+    """Top-k rows of a crop_counts() table per location, with totals, shares and ranks"""
+    keys = list(keys)
+    counts = counts.copy()
+
+    # Counts are in first-appearance order, which the stable sort below preserves for ties
+    counts["total"] = counts.groupby(keys, sort=False, observed=True)["count"].transform("sum")
+    counts = counts.sort_values("count", ascending=False, kind="stable")
+    counts["rank"] = counts.groupby(keys, sort=False, observed=True).cumcount() + 1
+
+    top = counts[counts["rank"] <= k].copy()
+    top["share"] = top["count"] / top["total"]
+    top = top.sort_values(keys + ["rank"], kind="stable").reset_index(drop=True)
+    return top[keys + [crop, "count", "total", "share", "rank"]]
+
+
+def top_crops(df, keys=LOCATION_KEYS, crop="Crop", k=1):
+    """Top-k crops per location with their row counts and shares
+
+    Returns one row per (location, crop) with columns keys + [crop,
+    "count", "total", "share", "rank"], ordered by location then rank.
+    Ties are ranked by first appearance in the data.
+    """
+    return rank_crops(crop_counts(df, keys, crop), keys, crop, k)
+
+
+def most_common_from_counts(counts, keys=LOCATION_KEYS, crop="Crop"):
+    """Most frequent crop per location of a crop_counts() table"""
+    top = rank_crops(counts, keys, crop, k=1)
+    return top[list(keys) + [crop]].rename(columns={crop: "most_common_crop"})
+
+
+def most_common_crop(df, keys=LOCATION_KEYS, crop="Crop"):
+    """Most frequent crop per location, as columns keys + ["most_common_crop"]"""
+    return most_common_from_counts(crop_counts(df, keys, crop), keys, crop)
+
+
+def top_crops_by_location(df, keys=LOCATION_KEYS, crop="Crop", k=3):
+    """{location tuple: [(crop, share), ...]} for quick keyed lookups"""
+    return location_lookup(top_crops(df, keys, crop, k), keys, crop)
+
+
+def location_lookup(top, keys=LOCATION_KEYS, crop="Crop"):
+    """Turn a rank_crops() table into {location tuple: [(crop, share), ...]}"""
+    keys = list(keys)
+    grouped = {}
+    for row in zip(*(top[column].tolist() for column in keys + [crop, "share"])):
+        grouped.setdefault(tuple(row[:-2]), []).append((row[-2], float(row[-1])))
+    return grouped
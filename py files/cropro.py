@@ -1,15 +1,16 @@
 # crop_rotation_train.py
 
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.preprocessing import LabelEncoder
-import random
-import joblib
+import argparse
+import numpy as np
+import pandas as pd
+import time
 
-# Load your crop dataset
-df = pd.read_csv("Crop_recommendation.csv")
+from datastore import load_table
+from model_registry import save_model
 
 # Rule-based simulated next crop mapping
 rotation_rules = {
@@ -23,38 +24,80 @@ rotation_rules = {
     'default': ['wheat', 'rice']
 }
 
+# Seed of the next-crop simulation, so every retrain sees the same labels
+ROTATION_SEED = 42
+
 # Simulate 'next_crop'
-def recommend_next_crop(crop):
-    return random.choice(rotation_rules.get(crop, rotation_rules['default']))
+def simulate_next_crops(labels, rng):
+    """Draw a next crop for every label, uniformly from its rotation candidates, in one pass"""
+    codes, crops = pd.factorize(np.asarray(labels))
+    candidates = [rotation_rules.get(crop, rotation_rules['default']) for crop in crops]
+
+    # One padded row of candidates per distinct crop, plus how many of them are real
+    width = max(len(options) for options in candidates)
+    table = np.array([options + options[:1] * (width - len(options)) for options in candidates])
+    counts = np.array([len(options) for options in candidates])
+
+    picks = (rng.random(len(codes)) * counts[codes]).astype(np.intp)
+    return table[codes, picks]
+
+def build_dataset(df, seed=ROTATION_SEED, augment=1, crop_encoder=None):
+    """Features (soil/climate + encoded current crop), simulated next-crop target and the encoder
+
+    With augment > 1 every source row appears that many times, each copy
+    with its own simulated next crop, so only augment a training split.
+    Pass crop_encoder to encode with an already fitted one.
+    """
+    if augment < 1:
+        raise ValueError(f"augment must be at least 1, got {augment}")
+
+    # Prepare features, encoding the current_crop feature
+    if crop_encoder is None:
+        crop_encoder = LabelEncoder().fit(df["label"])
+    X = df.drop(columns=["label"])
+    X["current_crop"] = crop_encoder.transform(df["label"])
+
+    rows = np.repeat(np.arange(len(df)), augment)
+    X = X.iloc[rows].reset_index(drop=True)
 
-df["next_crop"] = df["label"].apply(recommend_next_crop)
+    # Target: next crop
+    labels = df["label"].to_numpy()[rows]
+    y = pd.Series(simulate_next_crops(labels, np.random.default_rng(seed)), name="next_crop")
+    return X, y, crop_encoder
 
-# Prepare features
-X = df.drop(columns=["next_crop"])
-X["current_crop"] = df["label"]
-X = X.drop(columns=["label"])
+def main():
+    parser = argparse.ArgumentParser(description="Train the crop rotation model on simulated next crops.")
+    parser.add_argument("--seed", type=int, default=ROTATION_SEED, help="seed of the next-crop simulation")
+    parser.add_argument("--augment", type=int, default=1,
+                        help="simulated next crops drawn per training row")
+    args = parser.parse_args()
+    if args.augment < 1:
+        parser.error("--augment must be at least 1")
 
-# Encode the current_crop feature
-crop_encoder = LabelEncoder()
-X["current_crop"] = crop_encoder.fit_transform(X["current_crop"])
+    # Load your crop dataset
+    df = load_table("Crop_recommendation.csv")
 
-# Target: next crop
-y = df["next_crop"]
+    # Train/test split of the source rows, before augmenting, so no row has copies on both sides
+    train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
+    crop_encoder = LabelEncoder().fit(df["label"])
+    start = time.perf_counter()
+    X_train, y_train, _ = build_dataset(train_df, args.seed, args.augment, crop_encoder)
+    X_test, y_test, _ = build_dataset(test_df, args.seed + 1, 1, crop_encoder)
+    print(f"🧪 Simulated {len(y_train) + len(y_test)} rotation rows in {time.perf_counter() - start:.2f}s")
 
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.2, random_state=42
-)
+    # Train model on every core, then serve it single-threaded (n_jobs only slows one-row predicts)
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    model.fit(X_train, y_train)
+    model.set_params(n_jobs=None)
 
-# Train model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+    # Evaluate
+    y_pred = model.predict(X_test)
+    print(f"🔍 Accuracy: {accuracy_score(y_test, y_pred) * 100:.2f}%")
+    print("\n📋 Classification Report:\n", classification_report(y_test, y_pred))
 
-# Evaluate
-y_pred = model.predict(X_test)
-print(f"🔍 Accuracy: {accuracy_score(y_test, y_pred) * 100:.2f}%")
-print("\n📋 Classification Report:\n", classification_report(y_test, y_pred))
+    # Save model and encoder
+    save_model(model, "crop_rotation_model.pkl")
+    save_model(crop_encoder, "crop_encoder.pkl")
 
-# Save model and encoder
-joblib.dump(model, "crop_rotation_model.pkl")
-joblib.dump(crop_encoder, "crop_encoder.pkl")
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 # crop_rotation_predict.py
 
-import pandas as pd
 import joblib
 
+import rotation
+from rotation import ROTATION_FEATURES, rotation_input
+
 # Load model and encoder
 model = joblib.load("crop_rotation_model.pkl")
 crop_encoder = joblib.load("crop_encoder.pkl")
@@ -23,15 +25,14 @@ rotation_explanations = {
 current_crop = 'maize'
 features = [90, 42, 43, 21.0, 80.0, 6.5, 200.0]  # N, P, K, temp, humidity, pH, rainfall
 
-# Encode crop
-encoded_crop = crop_encoder.transform([current_crop])[0]
-features.append(encoded_crop)
+# Build the model's input row (crop code looked up, columns in training order)
+schema = rotation_input(model, crop_encoder)
+features = schema.row(dict(zip(ROTATION_FEATURES, features)), current_crop)
+if features is None:
+    raise SystemExit(f"❗ Unknown crop '{current_crop}'. Known crops: {', '.join(schema.known_crops)}")
 
 # Predict
-df_input = pd.DataFrame([features], columns=[
-    'N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'current_crop'
-])
-predicted_crop = model.predict(df_input)[0]
+predicted_crop = rotation.predict(model, features)[0]
 
 # Get reason
 explanation = rotation_explanations.get(
@@ -0,0 +1,196 @@
+# datastore.py
+"""Typed columnar cache for the project's CSV files.
+
+The first load of a CSV parses it once, turns the label columns (Season,
+Crops, Location, State, District, ...) into categoricals, downcasts
+integer columns and any float column that fits float32 without losing
+a digit, and writes the result to Parquet next to the CSV (pickle when
+pyarrow is not installed). Later loads read the typed copy directly; it
+is rebuilt whenever the CSV's size or modification time changes.
+
+Each typed copy is named after the CSV version it was built from, and the
+JSON stamp naming it is replaced last, so processes converting at the
+same time (gunicorn workers, Streamlit sessions) never read a half-written
+file or a copy from a different CSV version. Where the copy can't be
+written (a read-only checkout or container) the parsed, typed frame is
+returned without caching it.
+
+Grouping on the categorical columns should pass observed=True so only
+combinations present in the data are returned.
+
+Usage:
+    python datastore.py crop_data.csv data_season.csv ...   (convert and report the savings)
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:
+    pyarrow = None
+
+# Folder (next to each CSV) holding the typed copies
+CACHE_DIR = os.environ.get("DATASTORE_DIR", ".datastore")
+
+# Bump when the conversion rules change so every cache is rebuilt
+STORE_VERSION = 1
+
+# Label columns stored as categoricals wherever they appear
+CATEGORICAL_COLUMNS = ["Season", "Crops", "Location", "State", "District", "Crop", "Irrigation", "Soil type"]
+
+
+def cache_paths(path, stamp):
+    """Typed copy of one CSV version and the stamp file of the CSV"""
+    directory = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    base = os.path.join(directory, os.path.splitext(os.path.basename(path))[0])
+    version = hashlib.sha256(json.dumps(stamp, sort_keys=True).encode()).hexdigest()[:16]
+    return f"{base}-{version}" + (".parquet" if pyarrow else ".pkl"), base + ".json"
+
+
+def file_mode():
+    """Permissions a plain open() would give a new file under the current umask"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_atomic(path, write):
+    """Call write(tmp_path) and move the finished file over path"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        write(tmp_path)
+        # mkstemp creates files readable by the owner only
+        os.chmod(tmp_path, file_mode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def source_stamp(path):
+    """What the typed copy was built from; any change triggers a rebuild"""
+    stat = os.stat(path)
+    return {
+        "version": STORE_VERSION,
+        "format": "parquet" if pyarrow else "pickle",
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def downcast(values):
+    """Smallest integer type, or float32 when every value survives the round trip"""
+    if pd.api.types.is_integer_dtype(values):
+        return pd.to_numeric(values, downcast="integer")
+    if pd.api.types.is_float_dtype(values):
+        narrowed = values.astype(np.float32)
+        if narrowed.astype(values.dtype).equals(values):
+            return narrowed
+    return values
+
+
+def optimize(data, categoricals=CATEGORICAL_COLUMNS):
+    """Categorical label columns and downcast numeric columns"""
+    for column in data.columns:
+        if column in categoricals:
+            data[column] = data[column].astype("category")
+        else:
+            data[column] = downcast(data[column])
+    return data
+
+
+def read_stamp(stamp_path):
+    try:
+        with open(stamp_path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def convert(path):
+    """Parse a CSV, store its typed copy (when the directory is writable) and return it"""
+    stamp = source_stamp(path)
+    data_path, stamp_path = cache_paths(path, stamp)
+    data = optimize(pd.read_csv(path))
+
+    def write_stamp(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump({**stamp, "data": os.path.basename(data_path)}, f)
+
+    try:
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        if pyarrow:
+            write_atomic(data_path, lambda tmp_path: data.to_parquet(tmp_path, index=False))
+        else:
+            write_atomic(data_path, data.to_pickle)
+
+        # Switching the stamp publishes the new copy; the copy it pointed to before is dropped
+        previous = read_stamp(stamp_path)
+        write_atomic(stamp_path, write_stamp)
+    except OSError:
+        # Read-only checkout or container: serve the parsed frame uncached
+        return data
+    if previous and previous.get("data") not in (None, os.path.basename(data_path)):
+        try:
+            os.remove(os.path.join(os.path.dirname(data_path), previous["data"]))
+        except OSError:
+            pass
+    return data
+
+
+def fresh_copy(path):
+    """Path of the typed copy of a CSV when it is up to date, else None"""
+    stamp = source_stamp(path)
+    data_path, stamp_path = cache_paths(path, stamp)
+    stored = read_stamp(stamp_path)
+    if stored != {**stamp, "data": os.path.basename(data_path)} or not os.path.exists(data_path):
+        return None
+    return data_path
+
+
+def load_table(path, columns=None):
+    """Typed DataFrame of a CSV, converting it first when the CSV changed"""
+    data_path = fresh_copy(path)
+    try:
+        if data_path and pyarrow:
+            return pd.read_parquet(data_path, columns=columns)
+        if data_path:
+            data = pd.read_pickle(data_path)
+            return data[columns] if columns is not None else data
+    except FileNotFoundError:
+        # Another process replaced this copy between the check and the read
+        pass
+
+    data = convert(path)
+    return data[columns] if columns is not None else data
+
+
+def main():
+    paths = sys.argv[1:] or ["crop_data.csv"]
+    for path in paths:
+        start = time.perf_counter()
+        raw = pd.read_csv(path)
+        csv_seconds = time.perf_counter() - start
+
+        load_table(path)
+        start = time.perf_counter()
+        typed = load_table(path)
+        typed_seconds = time.perf_counter() - start
+
+        raw_mb = raw.memory_usage(deep=True).sum() / 1e6
+        typed_mb = typed.memory_usage(deep=True).sum() / 1e6
+        print(f"✅ {path}: load {csv_seconds * 1000:.1f} -> {typed_seconds * 1000:.1f} ms, "
+              f"memory {raw_mb:.1f} -> {typed_mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# flat_forest.py
+"""Compiled, flat-array inference engine for the crop recommendation forest.
+
+export_forest() packs every tree of a fitted RandomForestClassifier into
+one set of NumPy node arrays (feature, threshold, left, right, leaf
+distribution). FlatForest then walks all trees for a whole batch at once
+with a handful of vectorized gathers, reproducing scikit-learn's
+predict_proba() and predict() bit-for-bit. Thresholds are stored as
+float32, rounded down, which splits float32 inputs exactly like the
+float64 originals at half the size.
+
+Usage:
+    python flat_forest.py [crop_recommendation_model.pkl] [crop_recommendation_flat.pkl]
+"""
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from datastore import load_table
+from model_registry import save_model
+
+FLAT_MODEL_FILE = "crop_recommendation_flat.pkl"
+
+
+class FlatForest:
+    """Vectorized RandomForest evaluator over packed node arrays"""
+
+    def __init__(self, classes, roots, feature, threshold, left, right, leaf_index, leaf_values, max_depth):
+        self.classes_ = classes
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_index = leaf_index
+        self.leaf_values = leaf_values
+        self.max_depth = max_depth
+
+    def apply(self, X):
+        """Return the global leaf node reached in every tree, shape (n_trees, n_samples)"""
+        # Trees see float32 inputs, exactly like sklearn
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity.")
+
+        rows = np.arange(X.shape[0])
+        nodes = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        # Leaves loop back to themselves, so max_depth steps settle every path
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        """Average the leaf class distributions of all trees"""
+        leaves = self.leaf_index[self.apply(X)]
+        proba = np.zeros((leaves.shape[1], len(self.classes_)), dtype=np.float64)
+        # Accumulate tree by tree in training order, as RandomForestClassifier does
+        for tree_leaves in leaves:
+            proba += self.leaf_values[tree_leaves]
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X):
+        """Return the most probable crop for every row"""
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1))
+
+
+def float32_thresholds(threshold):
+    """Largest float32 at or below each threshold
+
+    For any float32 x, x <= t holds exactly when x <= float32_thresholds(t),
+    so the narrower thresholds send every input down the same branch.
+    """
+    narrowed = np.asarray(threshold, dtype=np.float64).astype(np.float32)
+    too_high = narrowed.astype(np.float64) > threshold
+    narrowed[too_high] = np.nextafter(narrowed[too_high], np.float32(-np.inf))
+    return narrowed
+
+
+def _leaf_distributions(estimator):
+    """Per-node class distributions exactly as the tree's predict_proba returns them"""
+    values = estimator.tree_.value[:, 0, :]
+    # Newer sklearn versions store normalized values, older ones raw counts
+    probe = np.zeros((1, estimator.tree_.n_features), dtype=np.float32)
+    reference = estimator.predict_proba(probe)[0]
+    if np.array_equal(reference, values[estimator.apply(probe)[0]]):
+        return values.copy()
+
+    normalizer = values.sum(axis=1)[:, np.newaxis]
+    normalizer[normalizer == 0.0] = 1.0
+    return values / normalizer
+
+
+def export_forest(forest):
+    """Pack a fitted RandomForestClassifier into a FlatForest"""
+    roots, features, thresholds, lefts, rights, leaves, distributions = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        leaves.append(node_ids[is_leaf] + offset)
+        distributions.append(_leaf_distributions(estimator)[is_leaf])
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    # Many leaves share a distribution, so each distinct one is stored once
+    leaf_values, inverse = np.unique(np.concatenate(distributions), axis=0, return_inverse=True)
+    leaf_index = np.zeros(offset, dtype=np.min_scalar_type(len(leaf_values)))
+    leaf_index[np.concatenate(leaves)] = inverse.reshape(-1)
+    node_dtype = np.min_scalar_type(offset)
+
+    return FlatForest(
+        classes=np.asarray(forest.classes_).astype(str),
+        roots=np.asarray(roots, dtype=node_dtype),
+        feature=np.concatenate(features).astype(np.min_scalar_type(forest.n_features_in_)),
+        threshold=float32_thresholds(np.concatenate(thresholds)),
+        left=np.concatenate(lefts).astype(node_dtype),
+        right=np.concatenate(rights).astype(node_dtype),
+        leaf_index=leaf_index,
+        leaf_values=leaf_values,
+        max_depth=max_depth,
+    )
+
+
+def save_flat_forest(flat, path=FLAT_MODEL_FILE):
+    """Write the packed forest uncompressed (so the registry can memory-map it) and atomically"""
+    save_model(flat, path)
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "crop_recommendation_model.pkl"
+    target = sys.argv[2] if len(sys.argv) > 2 else FLAT_MODEL_FILE
+
+    forest = joblib.load(source)
+    flat = export_forest(forest)
+    save_flat_forest(flat, target)
+
+    # Check parity and latency against sklearn on the training data
+    df = load_table("Crop_recommendation.csv")
+    X = df.drop("label", axis=1)
+    expected = forest.predict_proba(X)
+    actual = flat.predict_proba(X.to_numpy())
+    print(f"✅ Exported {len(flat.roots)} trees ({len(flat.feature)} nodes) to {target}")
+    print(f"🔍 Identical probabilities: {np.array_equal(expected, actual)}")
+    print(f"🔍 Identical predictions: {np.array_equal(forest.predict(X), flat.predict(X.to_numpy()))}")
+
+    row = X.iloc[[0]]
+    start = time.perf_counter()
+    for _ in range(100):
+        forest.predict(row)
+    sklearn_ms = (time.perf_counter() - start) * 10
+    start = time.perf_counter()
+    for _ in range(100):
+        flat.predict(row.to_numpy())
+    flat_ms = (time.perf_counter() - start) * 10
+    print(f"⏱️ Single-record latency: sklearn {sklearn_ms:.2f} ms, flat {flat_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    # Run through the importable module so the pickle references flat_forest.FlatForest
+    import flat_forest
+    flat_forest.main()
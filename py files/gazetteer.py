@@ -0,0 +1,183 @@
+# gazetteer.py
+"""Shared crop / state / district matcher for free-text questions.
+
+All vocabulary phrases are compiled once into an Aho-Corasick automaton
+over words, so every entity in a question - including multi-word names
+like "Tamil Nadu" or "pearl millet" - is found in a single left-to-right
+pass. Text is accent-folded ("Mahārāshtra" -> "maharashtra"), aliases map
+local names onto canonical ones ("paddy" -> "rice"), and unknown words
+that are one typo away from a vocabulary word are corrected first.
+"""
+import difflib
+import re
+import unicodedata
+from collections import deque, namedtuple
+
+Match = namedtuple("Match", ["kind", "name", "start", "end"])
+
+# Local and alternate names for the crops in Crop_recommendation.csv
+CROP_ALIASES = {
+    "rice": ["paddy", "dhan"],
+    "pearl millet": ["bajra"],
+    "pigeonpeas": ["pigeon peas", "arhar", "tur", "toor"],
+    "chickpea": ["chana", "gram", "bengal gram"],
+    "lentil": ["masoor"],
+    "mungbean": ["mung bean", "moong", "green gram"],
+    "blackgram": ["black gram", "urad"],
+    "kidneybeans": ["kidney beans", "rajma"],
+    "mothbeans": ["moth beans", "matki"],
+    "maize": ["corn", "makka"],
+    "wheat": ["gehun"],
+    "sugarcane": ["ganna"],
+}
+
+# Renamed or commonly misspelled states and districts, keyed by the name the datasets use
+STATE_ALIASES = {
+    "Odisha": ["orissa"],
+    "Puducherry": ["pondicherry"],
+}
+DISTRICT_ALIASES = {
+    "Bangalore": ["bengaluru"],
+    "Gulbarga": ["kalaburagi"],
+    "Belgaum": ["belagavi"],
+    "Mysore": ["mysuru"],
+    "Gurgaon": ["gurugram"],
+}
+PLACE_ALIASES = {**STATE_ALIASES, **DISTRICT_ALIASES}
+
+# Words shorter than this are never typo-corrected
+FUZZY_MIN_LENGTH = 5
+
+
+def plain(text):
+    """Strip accents while keeping case and spacing"""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).strip()
+
+
+def tokenize(text):
+    """Accent-folded lowercase words of a text"""
+    return re.findall(r"[a-z0-9]+", plain(text).lower())
+
+
+class Gazetteer:
+    """Word-level Aho-Corasick automaton over named entities"""
+
+    def __init__(self, fuzzy_cutoff=0.85):
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+        self._words = set()
+        self._built = False
+        self._corrections = {}
+
+    def add(self, kind, name, aliases=()):
+        """Register an entity of a kind ("crop", "state", ...) under its name and aliases"""
+        name = plain(name)
+        for phrase in (name, *aliases):
+            words = tokenize(phrase)
+            if not words:
+                continue
+            node = 0
+            for word in words:
+                if word not in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append([])
+                    self._goto[node][word] = len(self._goto) - 1
+                node = self._goto[node][word]
+            entry = (len(words), kind, name)
+            if entry not in self._outputs[node]:
+                self._outputs[node].append(entry)
+            self._words.update(words)
+        self._built = False
+        return self
+
+    def add_all(self, kind, names, aliases=None):
+        """Register many entities of one kind plus every canonical name of {name: [aliases]}
+
+        Canonical names are registered even when the vocabulary lacks them, so
+        their aliases always resolve; a vocabulary entry spelled like an alias
+        is left to that alias instead of becoming a second entity.
+        """
+        aliases = aliases or {}
+        alias_words = {tuple(tokenize(alias)) for phrases in aliases.values() for alias in phrases}
+        for name in [*names, *aliases]:
+            if isinstance(name, str) and name.strip() and tuple(tokenize(name)) not in alias_words:
+                self.add(kind, name, aliases.get(name, ()))
+        return self
+
+    def unresolved_aliases(self, kind, aliases):
+        """(alias, expected, found) for every alias that doesn't find its canonical name"""
+        problems = []
+        for name, phrases in aliases.items():
+            for alias in phrases:
+                found = self.find(alias, kind)
+                if found != plain(name):
+                    problems.append((alias, plain(name), found))
+        return problems
+
+    def build(self):
+        """Compute failure links; called automatically before the first search"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._outputs[child] = self._outputs[child] + [
+                    entry for entry in self._outputs[self._fail[child]] if entry not in self._outputs[child]
+                ]
+        self._corrections.clear()
+        self._built = True
+        return self
+
+    def _correct(self, word):
+        """Closest vocabulary word for an unknown word, or the word itself"""
+        if word in self._words or len(word) < FUZZY_MIN_LENGTH or self.fuzzy_cutoff is None:
+            return word
+        if word not in self._corrections:
+            candidates = [w for w in self._words if w[0] == word[0] and abs(len(w) - len(word)) <= 2]
+            close = difflib.get_close_matches(word, candidates, n=1, cutoff=self.fuzzy_cutoff)
+            self._corrections[word] = close[0] if close else word
+        return self._corrections[word]
+
+    def find_all(self, text):
+        """All non-overlapping entity mentions, leftmost-longest first, in text order"""
+        if not self._built:
+            self.build()
+
+        found = []
+        node = 0
+        for position, word in enumerate(tokenize(text)):
+            word = self._correct(word)
+            while node and word not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(word, 0)
+            for length, kind, name in self._outputs[node]:
+                found.append(Match(kind, name, position - length + 1, position + 1))
+
+        found.sort(key=lambda match: (match.start, match.start - match.end))
+        matches, taken_until = [], 0
+        for match in found:
+            if match.start >= taken_until:
+                matches.append(match)
+                taken_until = match.end
+            elif matches and (match.start, match.end) == (matches[-1].start, matches[-1].end):
+                # Same span, different kind (e.g. a district named like its state)
+                matches.append(match)
+        return matches
+
+    def find(self, text, kind):
+        """Name of the first entity of a kind mentioned in the text, or None"""
+        for match in self.find_all(text):
+            if match.kind == kind:
+                return match.name
+        return None
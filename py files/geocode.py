@@ -0,0 +1,190 @@
+# geocode.py
+"""District -> coordinate resolution between crop_data.csv and in.csv.
+
+District and state names are accent-folded ("Mahārāshtra" ->
+"maharashtra") and matched to in.csv cities of the same state: exact
+name, known alias, then a fuzzy match. Only districts still unmatched
+fall back to an exact name or alias in any state: "name" when the
+district's own state is unknown to in.csv, "other-state" (a likely
+namesake, left off the map) when its state is known but lacks the city.
+The result is a table keyed by the folded
+(state, district) pair, cached on disk together with a hash of both
+input files, so map builds and APIs do a keyed join instead of
+re-normalizing and re-matching on every run.
+
+Usage:
+    python geocode.py [--data crop_data.csv] [--cities in.csv] [--unmatched]
+"""
+import argparse
+import difflib
+import hashlib
+import os
+import re
+
+import joblib
+import pandas as pd
+
+from datastore import load_table
+from gazetteer import PLACE_ALIASES, plain
+
+GEOCODE_CACHE = "district_coords.pkl"
+
+# Bump when the matching rules change so cached tables are rebuilt
+RESOLVER_VERSION = 2
+
+# Minimum difflib similarity for a fuzzy district or state match
+FUZZY_CUTOFF = 0.85
+
+# Match methods whose coordinates lie in the district's own state (or one we couldn't identify)
+TRUSTED_MATCHES = ["exact", "alias", "fuzzy", "name"]
+
+
+def fold(text):
+    """Accent-folded, lowercase name with punctuation collapsed to single spaces"""
+    return re.sub(r"[^a-z0-9]+", " ", plain(text).lower()).strip()
+
+
+# Folded alias -> folded canonical name for renamed states and districts
+ALIASES = {fold(alias): fold(name) for name, aliases in PLACE_ALIASES.items() for alias in aliases}
+
+
+def fold_column(values):
+    """fold() a whole column, folding each distinct value only once"""
+    distinct = pd.Series(values.dropna().unique())
+    return values.map(dict(zip(distinct, distinct.map(fold))))
+
+
+def file_digest(*paths):
+    """sha256 over the contents of the input files and the resolver version"""
+    digest = hashlib.sha256(str(RESOLVER_VERSION).encode())
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _closest(name, candidates, cutoff=FUZZY_CUTOFF):
+    close = difflib.get_close_matches(name, candidates, n=1, cutoff=cutoff)
+    return close[0] if close else None
+
+
+def resolve_districts(locations, cities):
+    """Match every distinct (State, District) to an in.csv city
+
+    Returns one row per location with the folded "state"/"district" keys,
+    the matched "city", "lat", "lng" and how it matched ("exact", "alias",
+    "fuzzy", "name", "other-state" or None when unmatched).
+    """
+    cities = cities.assign(state=fold_column(cities["admin_name"]), city_key=fold_column(cities["city"]))
+    cities = cities.dropna(subset=["city_key"]).drop_duplicates(["state", "city_key"])
+    by_state = {
+        (state, city): row for state, city, row in zip(cities["state"], cities["city_key"], cities.index)
+    }
+    first_by_name = cities.drop_duplicates("city_key")
+    by_name = dict(zip(first_by_name["city_key"], first_by_name.index))
+    state_cities = cities.groupby("state")["city_key"].agg(list).to_dict()
+    known_states = list(state_cities)
+
+    keys = pd.DataFrame({
+        "state": fold_column(locations["State"]),
+        "district": fold_column(locations["District"]),
+    }).dropna().drop_duplicates().reset_index(drop=True)
+
+    state_matches = {}
+    for state in keys["state"].unique():
+        if state in state_cities:
+            state_matches[state] = state
+        elif ALIASES.get(state) in state_cities:
+            state_matches[state] = ALIASES[state]
+        else:
+            state_matches[state] = _closest(state, known_states)
+
+    rows, methods = [], []
+    for state, district in zip(keys["state"], keys["district"]):
+        city_state = state_matches[state]
+        alias = ALIASES.get(district)
+        if (city_state, district) in by_state:
+            rows.append(by_state[(city_state, district)])
+            methods.append("exact")
+        elif (city_state, alias) in by_state:
+            rows.append(by_state[(city_state, alias)])
+            methods.append("alias")
+        else:
+            close = _closest(district, state_cities.get(city_state, []))
+            if close:
+                rows.append(by_state[(city_state, close)])
+                methods.append("fuzzy")
+            elif district in by_name or alias in by_name:
+                # Same name in some other state: fine when we can't tell the state, suspect otherwise
+                rows.append(by_name.get(district, by_name.get(alias)))
+                methods.append("name" if city_state is None else "other-state")
+            else:
+                rows.append(None)
+                methods.append(None)
+
+    matched = cities.reindex(rows)
+    keys["city"] = matched["city"].to_numpy()
+    keys["lat"] = matched["lat"].to_numpy()
+    keys["lng"] = matched["lng"].to_numpy()
+    keys["match"] = methods
+    return keys
+
+
+def load_resolution(data_path="crop_data.csv", cities_path="in.csv", cache_path=GEOCODE_CACHE, locations=None):
+    """Resolution table for the two files, rebuilt only when either file changes
+
+    locations can pass State/District columns that were already read
+    (e.g. by a chunked pass) instead of reading them from data_path.
+    """
+    digest = file_digest(data_path, cities_path)
+    if os.path.exists(cache_path):
+        cached = joblib.load(cache_path)
+        if cached.get("digest") == digest:
+            return cached["table"]
+
+    if locations is None:
+        locations = load_table(data_path, columns=["State", "District"])
+    cities = load_table(cities_path, columns=["city", "lat", "lng", "admin_name"])
+    table = resolve_districts(locations, cities)
+    joblib.dump({"digest": digest, "table": table}, cache_path)
+    return table
+
+
+def coverage(table):
+    """How many locations matched, overall and per match method"""
+    methods = table["match"].value_counts().to_dict()
+    matched = int(table["match"].notna().sum())
+    return {
+        "locations": len(table),
+        "matched": matched,
+        "share": round(matched / len(table), 4) if len(table) else 0.0,
+        **{method: int(methods.get(method, 0)) for method in ("exact", "alias", "fuzzy", "name", "other-state")},
+    }
+
+
+def print_coverage(table):
+    """Print the match coverage of a resolution table"""
+    report = coverage(table)
+    print(f"📍 Geocoded {report['matched']}/{report['locations']} districts ({report['share']:.1%}): "
+          f"{report['exact']} exact, {report['alias']} by alias, {report['fuzzy']} fuzzy, {report['name']} by name, "
+          f"{report['other-state']} only in another state")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve crop_data.csv districts to in.csv coordinates.")
+    parser.add_argument("--data", default="crop_data.csv")
+    parser.add_argument("--cities", default="in.csv")
+    parser.add_argument("--cache", default=GEOCODE_CACHE)
+    parser.add_argument("--unmatched", action="store_true", help="list the districts without coordinates")
+    args = parser.parse_args()
+
+    table = load_resolution(args.data, args.cities, args.cache)
+    print_coverage(table)
+    if args.unmatched:
+        for state, district in table.loc[table["match"].isna(), ["state", "district"]].itertuples(index=False):
+            print(f"  {district}, {state}")
+
+
+if __name__ == "__main__":
+    main()
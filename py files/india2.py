@@ -1,7 +1,19 @@
+import argparse
+import os
+import time
+
 import pandas as pd
 import folium
 from folium.plugins import MarkerCluster
 
+from map_export import export_map, print_report
+
+parser = argparse.ArgumentParser(description="Build the India district crop map.")
+parser.add_argument("--geojson", metavar="OUT_DIR",
+                    help="write a GeoJSON map with lazily loaded popups instead of one HTML file")
+args = parser.parse_args()
+start = time.perf_counter()
+
 # Load your combined CSV with State, District, Crop, Latitude, Longitude
 df = pd.read_csv(".csv")  # Make sure it has 'State', 'District', 'Crop', 'Latitude', 'Longitude'
 
@@ -17,21 +29,29 @@ df = df.dropna(subset=["Latitude", "Longitude"])
 grouped = df.groupby(["State", "District", "Latitude", "Longitude"])["Crop"].unique().reset_index()
 grouped["Crops"] = grouped["Crop"].apply(lambda crops: ", ".join(sorted(set(crops))))
 
-# Create base map
-india_map = folium.Map(location=[22.9734, 78.6569], zoom_start=5)
-marker_cluster = MarkerCluster().add_to(india_map)
-
-# Add pins for each district
-for _, row in grouped.iterrows():
-    folium.Marker(
-        location=[row["Latitude"], row["Longitude"]],
-        popup=folium.Popup(
-            f"<b>{row['District']}, {row['State']}</b><br><b>Crops:</b> {row['Crops']}",
-            max_width=300,
-        ),
-        icon=folium.Icon(color="green", icon="leaf")
-    ).add_to(marker_cluster)
-
-# Save map
-india_map.save("india_crop_map.html")
-print("✅ Map saved as 'india_crop_map.html'")
+# Build all popups at once from the columns
+popups = "<b>" + grouped["District"] + ", " + grouped["State"] + "</b><br><b>Crops:</b> " + grouped["Crops"]
+
+if args.geojson:
+    report = export_map(args.geojson, grouped["Latitude"], grouped["Longitude"], popups.tolist())
+    print(f"✅ Map saved in '{args.geojson}'")
+else:
+    # Create base map
+    india_map = folium.Map(location=[22.9734, 78.6569], zoom_start=5)
+    marker_cluster = MarkerCluster().add_to(india_map)
+
+    # Add pins for each district
+    for lat, lng, popup in zip(grouped["Latitude"], grouped["Longitude"], popups):
+        folium.Marker(
+            location=[lat, lng],
+            popup=folium.Popup(popup, max_width=300),
+            icon=folium.Icon(color="green", icon="leaf")
+        ).add_to(marker_cluster)
+
+    # Save map
+    india_map.save("india_crop_map.html")
+    print("✅ Map saved as 'india_crop_map.html'")
+    report = {"features": len(grouped), "initial_payload_bytes": os.path.getsize("india_crop_map.html")}
+
+report["seconds"] = round(time.perf_counter() - start, 3)
+print_report(report)
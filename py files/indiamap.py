@@ -1,31 +1,66 @@
+import argparse
+import os
+import time
+
 import pandas as pd
 import folium
 from folium.plugins import MarkerCluster
 
-# Load datasets
-df = pd.read_csv("crop_data.csv")
-city_coords = pd.read_csv("in.csv")
+from crop_aggregates import most_common_crop, most_common_from_counts
+from datastore import load_table
+from geocode import TRUSTED_MATCHES, fold_column, load_resolution, print_coverage
+from map_export import export_map, print_report
+from stream_ingest import STREAMING, district_counts
+
+parser = argparse.ArgumentParser(description="Build the India most-common-crop map.")
+parser.add_argument("--geojson", metavar="OUT_DIR",
+                    help="write a GeoJSON map with lazily loaded popups instead of one HTML file")
+args = parser.parse_args()
+start = time.perf_counter()
 
-# Standardize strings
-df["District"] = df["District"].str.lower().str.strip()
-df["State"] = df["State"].str.lower().str.strip()
-city_coords["city"] = city_coords["city"].str.lower().str.strip()
-city_coords["admin_name"] = city_coords["admin_name"].str.lower().str.strip()
+if STREAMING:
+    # Count crops per district from bounded chunks instead of loading the whole file
+    counts = district_counts("crop_data.csv")
+    top_crops = most_common_from_counts(counts)
+    locations = counts[["State", "District"]].drop_duplicates()
+else:
+    # Load dataset, folding names the same way the coordinate table is keyed
+    df = load_table("crop_data.csv")
+    df["District"] = fold_column(df["District"])
+    df["State"] = fold_column(df["State"])
 
-# Get most common crop per district
-top_crops = df.dropna(subset=["Crop"]).groupby(["State", "District"])["Crop"].agg(lambda x: x.value_counts().index[0]).reset_index()
+    # Get most common crop per district
+    top_crops = most_common_crop(df)
+    locations = df[["State", "District"]]
 top_crops.columns = ["state", "district", "most_common_crop"]
 
-# Merge with coordinates
-merged = pd.merge(top_crops, city_coords, how="inner", left_on="district", right_on="city")
+# Cached district -> coordinate table
+coords = load_resolution("crop_data.csv", "in.csv", locations=locations)
+print_coverage(coords)
+
+# Keyed join with the resolved coordinates
+merged = pd.merge(top_crops, coords[coords["match"].isin(TRUSTED_MATCHES)], how="inner", on=["state", "district"])
+
+# Build all popups at once from the columns
+popups = (
+    "<b>District:</b> " + merged["district"].str.title() +
+    "<br><b>State:</b> " + merged["state"].str.title() +
+    "<br><b>Crop:</b> " + merged["most_common_crop"].astype(str)
+)
+
+if args.geojson:
+    report = export_map(args.geojson, merged["lat"], merged["lng"], popups.tolist())
+else:
+    # Create map
+    india_map = folium.Map(location=[22.9734, 78.6569], zoom_start=5)
+    marker_cluster = MarkerCluster().add_to(india_map)
 
-# Create map
-india_map = folium.Map(location=[22.9734, 78.6569], zoom_start=5)
-marker_cluster = MarkerCluster().add_to(india_map)
+    for lat, lng, popup in zip(merged["lat"], merged["lng"], popups):
+        folium.Marker(location=[lat, lng], popup=popup).add_to(marker_cluster)
 
-for _, row in merged.iterrows():
-    popup = f"<b>District:</b> {row['district'].title()}<br><b>State:</b> {row['state'].title()}<br><b>Crop:</b> {row['most_common_crop']}"
-    folium.Marker(location=[row['lat'], row['lng']], popup=popup).add_to(marker_cluster)
+    # Save to HTML
+    india_map.save("Crop_Map_India.html")
+    report = {"features": len(merged), "initial_payload_bytes": os.path.getsize("Crop_Map_India.html")}
 
-# Save to HTML
-india_map.save("Crop_Map_India.html")
+report["seconds"] = round(time.perf_counter() - start, 3)
+print_report(report)
@@ -0,0 +1,152 @@
+# inference.py
+"""Request-independent prediction logic shared by app.py and asgi_app.py.
+
+Everything here takes plain values or NumPy arrays and returns plain
+values, so the same functions serve Flask request threads, the coalescer
+and the process pool behind the async server (whose workers run
+init_worker() once to load the models before their first request).
+"""
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+import model_registry
+import rotation
+from rotation import rotation_input
+
+# Soil & climate inputs, in the column order the recommendation model was trained on
+FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+
+# Crop rotation explanation rules
+rotation_explanations = {
+    ('rice', 'chickpea'): "Rice depletes nitrogen heavily. Chickpea, a legume, helps restore soil nitrogen.",
+    ('rice', 'lentil'): "Rice exhausts nitrogen. Lentil is nitrogen-fixing and ideal for soil recovery.",
+    ('maize', 'soybean'): "Maize consumes nutrients. Soybean replenishes soil with nitrogen.",
+    ('wheat', 'blackgram'): "Blackgram improves soil texture and fixes nitrogen post wheat.",
+    ('wheat', 'sunflower'): "Sunflower helps disrupt wheat disease cycles and balances nutrients.",
+    ('cotton', 'pearl millet'): "Cotton attracts pests. Millet rotation reduces pest buildup.",
+    ('banana', 'pigeonpeas'): "Pigeonpeas help restore nitrogen post banana farming.",
+    'default': "This crop rotation maintains soil health and improves biodiversity."
+}
+
+
+class UnknownCropError(ValueError):
+    """The current crop is not one the rotation model was trained on"""
+
+    def __init__(self, crop, known_crops):
+        # Both values stay in args so the error pickles across process boundaries
+        super().__init__(crop, known_crops)
+        self.crop = crop
+        self.known_crops = known_crops
+
+    def __str__(self):
+        return f"Unknown crop '{self.crop}'."
+
+
+def init_worker():
+    """Load the serving models into this process before it takes requests"""
+    model_registry.preload()
+
+
+def soil_features(data):
+    """Feature list of one /predict-crop payload"""
+    return [data[column] for column in FEATURES]
+
+
+def recommend_crops(rows):
+    """Recommended crop for every row of a feature matrix"""
+    return model_registry.get_model(model_registry.RECOMMENDATION_MODEL).predict(rows)
+
+
+def recommend_crop(features):
+    """Recommended crop for one feature list"""
+    return recommend_crops([features])[0]
+
+
+def records_features(records):
+    """Feature matrix of a DataFrame of soil records"""
+    missing = [column for column in FEATURES if column not in records.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    # Blanks, nulls and text would otherwise reach the forest as NaN and still get a confident answer
+    values = records[FEATURES].apply(pd.to_numeric, errors='coerce')
+    invalid = values.isna().to_numpy()
+    if invalid.any():
+        row, column = np.argwhere(invalid)[0]
+        raise ValueError(f"Record {row}: '{FEATURES[column]}' is missing or not a number.")
+    return values.to_numpy(dtype=np.float64)
+
+
+def payload_features(payload=None, csv_bytes=None):
+    """Feature matrix of a CSV body or a parsed JSON array of records"""
+    if csv_bytes is not None:
+        records = pd.read_csv(io.BytesIO(csv_bytes))
+    elif isinstance(payload, list):
+        for i, record in enumerate(payload):
+            if not isinstance(record, dict):
+                raise ValueError(f"Record {i} is not a JSON object.")
+        records = pd.DataFrame.from_records(payload, columns=None if payload else FEATURES)
+    else:
+        raise ValueError("Expected a JSON array of records or a CSV upload.")
+    return records_features(records)
+
+
+def recommend_batch(features):
+    """Recommended crops and their probabilities for a feature matrix, in one vectorized call"""
+    model = model_registry.get_model(model_registry.RECOMMENDATION_MODEL)
+    if len(features):
+        probabilities = model.predict_proba(features)
+    else:
+        probabilities = np.empty((0, len(model.classes_)))
+    best = probabilities.argmax(axis=1)
+    return model.classes_.take(best), probabilities[np.arange(len(best)), best]
+
+
+def recommend_payload(payload=None, csv_bytes=None):
+    """recommend_batch() straight from a request body, parsed where the prediction runs"""
+    return recommend_batch(payload_features(payload, csv_bytes))
+
+
+def batch_lines(crops, confidence, chunk_size):
+    """Newline-delimited JSON results, chunk_size lines per yielded string"""
+    for start in range(0, len(crops), chunk_size):
+        stop = min(start + chunk_size, len(crops))
+        yield "".join(
+            json.dumps({
+                "index": i,
+                "recommended_crop": str(crops[i]),
+                "confidence": round(float(confidence[i]), 4)
+            }) + "\n"
+            for i in range(start, stop)
+        )
+
+
+def rotation_features(data, current_crop):
+    """One-row rotation feature matrix; raises UnknownCropError for crops the encoder never saw"""
+    schema = rotation_input(model_registry.get_model("crop_rotation"), model_registry.get_model("crop_encoder"))
+    features = schema.row(data, current_crop)
+    if features is None:
+        raise UnknownCropError(current_crop, schema.known_crops)
+    return features
+
+
+def next_crops(rows):
+    """Predicted next crop for every row of a rotation feature matrix"""
+    return rotation.predict(model_registry.get_model("crop_rotation"), rows)
+
+
+def rotation_reason(current_crop, next_crop):
+    return rotation_explanations.get((current_crop, next_crop), rotation_explanations['default'])
+
+
+def next_crop(data, current_crop):
+    """/predict-next-crop response body for one request"""
+    predicted_crop = str(next_crops(rotation_features(data, current_crop))[0])
+    return {
+        "current_crop": current_crop,
+        "recommended_next_crop": predicted_crop,
+        "reason": rotation_reason(current_crop, predicted_crop)
+    }
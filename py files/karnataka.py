@@ -9,9 +9,11 @@ from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import mean_squared_error, r2_score
 
+from datastore import load_table
+
 # Load the dataset
 try:
-    df = pd.read_csv('data_season.csv')
+    df = load_table('data_season.csv')
 except FileNotFoundError:
     print("Error: 'data_season.csv' not found. Make sure the file is in the same directory.")
     exit()
@@ -56,7 +58,7 @@ plt.show()
 # 2. Price by Location
 plt.figure(figsize=(12, 7))
 # Calculate mean price per location for better bar plot interpretation
-mean_price_location = analysis_df.groupby('Location')['price'].mean().sort_values(ascending=False)
+mean_price_location = analysis_df.groupby('Location', observed=True)['price'].mean().sort_values(ascending=False)
 sns.barplot(x=mean_price_location.index, y=mean_price_location.values)
 plt.title('Average Crop Price by Location')
 plt.xlabel('Location')
@@ -1,12 +1,12 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 from chatbot import answer_question
 from rules_engine import detect_wrong_practices
 from crop_models import recommend_crop_env, recommend_crop_location, recommend_crop_rotation
+from datastore import load_table
 
 # Load data
-df = pd.read_csv("data_season.csv")
+df = load_table("data_season.csv")
 
 st.set_page_config(page_title="Smart Crop Advisory Dashboard", layout="wide")
 st.title("\ud83c\udf3e Smart Crop Advisory System")
@@ -30,7 +30,7 @@ if option == "Home Dashboard":
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("Average Yield per Crop")
-        fig = px.bar(df.groupby("Crops")["yeilds"].mean().sort_values().reset_index(), x="yeilds", y="Crops", orientation='h')
+        fig = px.bar(df.groupby("Crops", observed=True)["yeilds"].mean().sort_values().reset_index(), x="yeilds", y="Crops", orientation='h')
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
@@ -0,0 +1,142 @@
+# map_export.py
+"""Lightweight GeoJSON export for the India crop maps.
+
+Instead of one folium.Marker (with its popup inlined) per district, the
+districts are written as a single GeoJSON FeatureCollection built from
+whole columns. Popup HTML is split into small per-tile JSON files that
+the page fetches only when a marker in that tile is clicked, so the
+initial download stays small even at full district coverage.
+
+The output folder has to be served over HTTP (e.g. python -m http.server),
+since browsers block fetch() from file:// pages.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+# Size of a popup tile in degrees of latitude/longitude
+TILE_DEGREES = 2.0
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title}</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.css">
+<link rel="stylesheet" href="https://unpkg.com/leaflet.markercluster@1.5.3/dist/MarkerCluster.Default.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<script src="https://unpkg.com/leaflet.markercluster@1.5.3/dist/leaflet.markercluster.js"></script>
+<style>html, body, #map {{ height: 100%; margin: 0; }}</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var map = L.map("map").setView([22.9734, 78.6569], 5);
+L.tileLayer("https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png", {{
+    attribution: "&copy; OpenStreetMap contributors"
+}}).addTo(map);
+
+var tiles = {{}};
+function popupTile(tile) {{
+    if (!tiles[tile]) {{
+        tiles[tile] = fetch("popups/" + tile + ".json").then(function (r) {{ return r.json(); }});
+    }}
+    return tiles[tile];
+}}
+
+fetch("{geojson}").then(function (r) {{ return r.json(); }}).then(function (data) {{
+    var cluster = L.markerClusterGroup();
+    L.geoJSON(data, {{
+        onEachFeature: function (feature, layer) {{
+            layer.bindPopup("Loading...");
+            layer.on("click", function () {{
+                popupTile(feature.properties.tile).then(function (popups) {{
+                    layer.setPopupContent(popups[feature.id]);
+                }});
+            }});
+        }}
+    }}).addTo(cluster);
+    map.addLayer(cluster);
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def tile_keys(lat, lng, size=TILE_DEGREES):
+    """Tile name ("row_col") of every point"""
+    rows = np.floor(np.asarray(lat, dtype=float) / size).astype(int)
+    cols = np.floor(np.asarray(lng, dtype=float) / size).astype(int)
+    return np.char.add(np.char.add(rows.astype(str), "_"), cols.astype(str))
+
+
+def feature_collection(lat, lng, tiles, properties=None):
+    """GeoJSON FeatureCollection of points built from whole columns"""
+    coordinates = np.column_stack([np.asarray(lng, dtype=float), np.asarray(lat, dtype=float)]).round(5).tolist()
+    extra = properties.to_dict("records") if properties is not None else [{}] * len(coordinates)
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": i,
+                "geometry": {"type": "Point", "coordinates": point},
+                "properties": {"tile": tile, **props},
+            }
+            for i, (point, tile, props) in enumerate(zip(coordinates, tiles.tolist(), extra))
+        ],
+    }
+
+
+def _write_json(path, payload):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    return os.path.getsize(path)
+
+
+def export_map(out_dir, lat, lng, popups, properties=None, title="India Crop Map"):
+    """Write index.html, districts.geojson and per-tile popup files into out_dir
+
+    popups is a sequence of popup HTML strings aligned with lat/lng.
+    Returns a report with the generation time and payload sizes in bytes.
+    """
+    start = time.perf_counter()
+    os.makedirs(os.path.join(out_dir, "popups"), exist_ok=True)
+
+    tiles = tile_keys(lat, lng)
+    collection = feature_collection(lat, lng, tiles, properties)
+    geojson_bytes = _write_json(os.path.join(out_dir, "districts.geojson"), collection)
+
+    by_tile = {}
+    for i, (tile, html) in enumerate(zip(tiles.tolist(), popups)):
+        by_tile.setdefault(tile, {})[i] = html
+    popup_bytes = sum(
+        _write_json(os.path.join(out_dir, "popups", f"{tile}.json"), entries)
+        for tile, entries in by_tile.items()
+    )
+
+    page_path = os.path.join(out_dir, "index.html")
+    with open(page_path, "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(title=title, geojson="districts.geojson"))
+    page_bytes = os.path.getsize(page_path)
+
+    return {
+        "features": len(collection["features"]),
+        "tiles": len(by_tile),
+        "seconds": round(time.perf_counter() - start, 3),
+        "initial_payload_bytes": page_bytes + geojson_bytes,
+        "popup_bytes": popup_bytes,
+    }
+
+
+def print_report(report):
+    """Print the generation time and payload size of a map build"""
+    print(f"✅ Mapped {report['features']} districts in {report['seconds']}s")
+    print(f"📦 Initial payload: {report['initial_payload_bytes'] / 1024:.1f} KB")
+    if "popup_bytes" in report:
+        print(f"📦 Lazy popups: {report['popup_bytes'] / 1024:.1f} KB in {report['tiles']} tiles")
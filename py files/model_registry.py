@@ -0,0 +1,199 @@
+# model_registry.py
+"""Lazy, shared access to the serialized crop models.
+
+Every entry point (the Flask app, the Streamlit advisor and the natural
+language script) goes through get_model() instead of unpickling at import
+time, so a process only pays for the models it actually uses.
+
+Models are loaded with joblib's mmap_mode: plain NumPy arrays inside the
+artifact are mapped read-only from disk and shared copy-on-write between
+forked workers. scikit-learn copies tree nodes into its own buffers while
+unpickling, so for pre-fork servers set MODEL_PRELOAD=1 and run
+gunicorn --preload: app.py then calls preload() in the master process and
+the workers inherit the pages.
+
+A loaded model remembers the SHA-256 of the artifact it came from
+(loaded_fingerprint). At most every MODEL_RELOAD_SECONDS, get_model()
+checks the file again and reloads the model if it now holds something
+else, e.g. after a retrain. A missing or unloadable file keeps the
+loaded model. Write artifacts with save_model(), never in place.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+
+import joblib
+
+from datastore import write_atomic
+
+# Directory holding the .pkl artifacts (the scripts are run from "py files")
+MODEL_DIR = os.environ.get("MODEL_DIR", ".")
+
+# joblib memory-map mode; set MODEL_MMAP_MODE="" to load fully into memory
+MMAP_MODE = os.environ.get("MODEL_MMAP_MODE", "r") or None
+
+MODEL_FILES = {
+    "crop_recommendation": "crop_recommendation_model.pkl",
+    "crop_recommendation_flat": "crop_recommendation_flat.pkl",
+    "crop_recommendation_compact": "crop_recommendation_compact.pkl",
+    "crop_rotation": "crop_rotation_model.pkl",
+    "crop_encoder": "crop_encoder.pkl",
+}
+
+# CROP_MODEL_BACKEND picks which artifact serves crop recommendations:
+# "flat" is the compiled flat forest, "compact" the output of compress_model.py
+RECOMMENDATION_BACKENDS = {
+    "flat": "crop_recommendation_flat",
+    "compact": "crop_recommendation_compact",
+}
+RECOMMENDATION_MODEL = RECOMMENDATION_BACKENDS.get(os.environ.get("CROP_MODEL_BACKEND"), "crop_recommendation")
+
+# Models the apps actually serve
+SERVING_MODELS = [RECOMMENDATION_MODEL, "crop_rotation", "crop_encoder"]
+
+# Artifacts only built on request (flat_forest.py, compress_model.py), so they may be missing
+OPTIONAL_MODELS = {"crop_recommendation_flat", "crop_recommendation_compact"}
+
+# MODEL_PRELOAD=1 makes app.py load SERVING_MODELS at import, before a pre-fork server forks
+PRELOAD = os.environ.get("MODEL_PRELOAD") == "1"
+
+# MODEL_RUNTIME=onnx serves these models from the graphs written by onnx_export.py
+MODEL_RUNTIME = os.environ.get("MODEL_RUNTIME", "sklearn")
+ONNX_FILES = {
+    "crop_recommendation": "crop_recommendation.onnx",
+    "crop_rotation": "crop_rotation_model.onnx",
+    "crop_encoder": "crop_encoder.onnx",
+}
+
+# Seconds between checks of a loaded model's artifact for changes (0 never reloads)
+RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_SECONDS", "1"))
+
+_models = {}
+_load_timings = {}
+_fingerprints = {}
+_loaded_fingerprints = {}
+_checked_at = {}
+_lock = threading.Lock()
+
+
+def model_path(name):
+    """Return the on-disk path of a registered model"""
+    try:
+        return os.path.join(MODEL_DIR, MODEL_FILES[name])
+    except KeyError:
+        raise KeyError(f"Unknown model '{name}'. Known models: {', '.join(MODEL_FILES)}") from None
+
+
+def artifact_path(name):
+    """Return the file get_model() loads for a model under the current MODEL_RUNTIME"""
+    if MODEL_RUNTIME == "onnx" and name in ONNX_FILES:
+        return os.path.join(MODEL_DIR, ONNX_FILES[name])
+    return model_path(name)
+
+
+def fingerprint(name):
+    """SHA-256 of a model's artifact, rehashed only when its inode, size or mtime changes"""
+    path = artifact_path(name)
+    info = os.stat(path)
+    stamp = (info.st_ino, info.st_size, info.st_mtime_ns)
+    cached = _fingerprints.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    _fingerprints[path] = (stamp, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _load(name):
+    # Called with the lock held; hash first, so a file replaced mid-load is caught by the next check
+    started = time.perf_counter()
+    loaded_fingerprint = fingerprint(name)
+    if MODEL_RUNTIME == "onnx" and name in ONNX_FILES:
+        from onnx_export import load_onnx_model
+        model = load_onnx_model(artifact_path(name))
+    else:
+        model = joblib.load(model_path(name), mmap_mode=MMAP_MODE)
+    _load_timings[name] = time.perf_counter() - started
+    _loaded_fingerprints[name] = loaded_fingerprint
+    _checked_at[name] = time.monotonic()
+    _models[name] = model
+    return model
+
+
+def _artifact_changed(name):
+    """Whether a loaded model's artifact now holds something else; a stat per interval, a rehash only on change"""
+    if RELOAD_INTERVAL <= 0:
+        return False
+    now = time.monotonic()
+    if now - _checked_at.get(name, float("-inf")) < RELOAD_INTERVAL:
+        return False
+    _checked_at[name] = now
+    try:
+        current = fingerprint(name)
+    except OSError:
+        # Missing or unreadable (e.g. mid-deploy): keep serving the loaded model
+        return False
+    return current != _loaded_fingerprints.get(name)
+
+
+def save_model(model, path):
+    """joblib.dump model to a temp file and move it over path
+
+    Serving processes memory-map the arrays of the artifact they loaded;
+    rewriting that file in place would pull the pages from under them.
+    """
+    write_atomic(path, lambda tmp_path: joblib.dump(model, tmp_path))
+
+
+def get_model(name):
+    """Return a registered model, loading it on first use and reloading it when its artifact changed"""
+    model = _models.get(name)
+    if model is not None and not _artifact_changed(name):
+        return model
+
+    with _lock:
+        # Another thread may have finished loading while we waited
+        current = _models.get(name)
+        if current is not model:
+            return current
+        if model is None:
+            return _load(name)
+        try:
+            model = _load(name)
+        except Exception as e:
+            # Missing, or caught half-written by an in-place dump; try again after the next change
+            print(f"⚠️ Could not reload '{name}', serving the loaded model: {e!r}", file=sys.stderr, flush=True)
+    return model
+
+
+def preload(names=None):
+    """Load the given models (the served ones by default) ahead of first use; returns the names loaded"""
+    loaded = []
+    for name in names or SERVING_MODELS:
+        # A missing optional artifact is only an error when it is the one being served
+        if name in OPTIONAL_MODELS and name != RECOMMENDATION_MODEL and not os.path.exists(artifact_path(name)):
+            continue
+        get_model(name)
+        loaded.append(name)
+    return loaded
+
+
+def is_loaded(name):
+    """Check whether a model is already in memory"""
+    return name in _models
+
+
+def loaded_fingerprint(name):
+    """SHA-256 of the artifact the in-memory model was loaded from, or None if it isn't loaded"""
+    return _loaded_fingerprints.get(name)
+
+
+def load_timings():
+    """Return the load time in seconds of every model loaded so far"""
+    return dict(_load_timings)
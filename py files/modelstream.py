@@ -1,17 +1,10 @@
 import streamlit as st
-import pickle
 import numpy as np
 import pandas as pd
 
-# Load Models
-with open("crop_recommendation_model.pkl", "rb") as f:
-    model1 = pickle.load(f)
+import model_registry
 
-with open("crop_encoder.pkl", "rb") as f:
-    model2 = pickle.load(f)
-
-with open("crop_rotation_model.pkl", "rb") as f:
-    model3 = pickle.load(f)
+# Models are loaded once per process on first use, not on every rerun
 
 st.set_page_config(page_title="Crop Advisor", layout="wide")
 st.title("🌾 Intelligent Crop Advisor")
@@ -40,6 +33,7 @@ with tab1:
 
     if st.button("🔍 Predict Best Crop", key="model1"):
         features = np.array([[N, P, K, temp, humidity, ph, rainfall]])
+        model1 = model_registry.get_model(model_registry.RECOMMENDATION_MODEL)
         prediction = model1.predict(features)[0]
         st.success(f"🌱 Recommended Crop: **{prediction.capitalize()}**")
 
@@ -63,6 +57,7 @@ with tab2:
                                       columns=['State', 'District', 'Season'])
 
             # If model2 expects encoded input, encode using saved encoder if available
+            model2 = model_registry.get_model("crop_encoder")
             prediction = model2.predict(input_data)[0]
             st.success(f"🌾 Suitable Crop: **{prediction.capitalize()}**")
         except Exception as e:
@@ -78,6 +73,7 @@ with tab3:
 
     if st.button("🔁 Suggest Next Crop", key="model3"):
         try:
+            model3 = model_registry.get_model("crop_rotation")
             prediction = model3.predict([[prev_crop]])[0]
             st.success(f"🔄 You should rotate to: **{prediction.capitalize()}**")
         except Exception as e:
@@ -1,27 +1,61 @@
+import argparse
+import json
 import joblib
+import os
 import pandas as pd
+import queue
 import re
 import spacy
+import sys
+import threading
+import time
+
+import model_registry
+from datastore import load_table
+from gazetteer import CROP_ALIASES, DISTRICT_ALIASES, STATE_ALIASES, Gazetteer, tokenize
+
+# Only the named entity recognizer is used; skip loading the rest of the pipeline
+UNUSED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
 
 # Load NLP model for entity extraction
-nlp = spacy.load("en_core_web_sm")
+nlp = spacy.load("en_core_web_sm", exclude=UNUSED_PIPES)
 
 # Load classifiers
 vec = joblib.load("intent_vectorizer.pkl")
 clf = joblib.load("intent_classifier.pkl")
-model1 = joblib.load("crop_recommendation_model.pkl")  # NPK model
-model2 = joblib.load("crop_encoder.pkl")               # State-season model
-model3 = joblib.load("crop_rotation_model.pkl")        # Crop rotation
 
-# Get user question
-question = input("🧑‍🌾 Ask your question: ")
+# Crop models are loaded lazily by the registry, only for the intent being answered
+
+# Build the crop / state / district matcher once from the datasets' vocabularies
+def build_gazetteer():
+    crops = ['rice', 'wheat', 'maize', 'cotton', 'sugarcane', 'banana', 'mungbean']
+    states = ['Karnataka', 'Tamil Nadu', 'Maharashtra', 'Punjab', 'Bihar']
+    districts = ['Gulbarga', 'Belgaum', 'Nagpur', 'Chennai', 'Patna']
+
+    crops += list(model_registry.get_model("crop_encoder").classes_)
+    cities = load_table("in.csv", columns=["city", "admin_name"])
+    states += cities["admin_name"].dropna().unique().tolist()
+    districts += cities["city"].dropna().unique().tolist()
+    if os.path.exists("crop_data.csv"):
+        locations = load_table("crop_data.csv", columns=["State", "District"])
+        states += locations["State"].dropna().unique().tolist()
+        districts += locations["District"].dropna().unique().tolist()
 
-# Predict intent
-X_test = vec.transform([question])
-intent = clf.predict(X_test)[0]
+    matcher = (
+        Gazetteer()
+        .add_all("crop", crops, CROP_ALIASES)
+        .add_all("state", states, STATE_ALIASES)
+        .add_all("district", districts, DISTRICT_ALIASES)
+        .build()
+    )
+    # An alias shadowed by another vocabulary entry would silently answer for the wrong place or crop
+    for kind, aliases in (("crop", CROP_ALIASES), ("state", STATE_ALIASES), ("district", DISTRICT_ALIASES)):
+        unresolved = matcher.unresolved_aliases(kind, aliases)
+        if unresolved:
+            raise ValueError(f"Unresolved {kind} aliases (alias, expected, found): {unresolved}")
+    return matcher
 
-# Run NLP pipeline
-doc = nlp(question)
+gazetteer = build_gazetteer()
 
 # Utility functions
 def extract_numbers(text):
@@ -35,61 +69,186 @@ def extract_season(text):
     return None
 
 def extract_crop(text):
-    crops = ['rice', 'wheat', 'maize', 'cotton', 'sugarcane', 'banana', 'mungbean']
-    for c in crops:
-        if c in text.lower():
-            return c
-    return None
-
-def extract_state_and_district(text):
-    # Add your actual state and district list here
-    states = ['Karnataka', 'Tamil Nadu', 'Maharashtra', 'Punjab', 'Bihar']
-    districts = ['Gulbarga', 'Belgaum', 'Nagpur', 'Chennai', 'Patna']
+    return gazetteer.find(text, "crop")
 
+def extract_state_and_district(text, doc=None):
     found_state, found_district = None, None
-    for word in text.split():
-        word_clean = word.strip().title()
-        if word_clean in states and not found_state:
-            found_state = word_clean
-        elif word_clean in districts and not found_district:
-            found_district = word_clean
+    matches = gazetteer.find_all(text)
+    for match in matches:
+        if match.kind == "state" and not found_state:
+            found_state = match.name
+        elif match.kind == "district" and not found_district:
+            found_district = match.name
+
+    # Fall back to place names spotted by spaCy's NER, skipping any the gazetteer already
+    # matched (e.g. "Orissa", which it read as the state Odisha)
+    if doc is not None and not found_district:
+        for ent in doc.ents:
+            if ent.label_ != "GPE":
+                continue
+            # Word span of the entity, counted the way the gazetteer counts words
+            start = len(tokenize(text[:ent.start_char]))
+            end = start + len(tokenize(ent.text))
+            if end > start and not any(match.start < end and start < match.end for match in matches):
+                found_district = ent.text
+                break
 
     return found_state, found_district
 
 
-# Handle based on intent
-if intent == 1:
-    print("🔍 Using Model 1 (Soil-based Crop Recommender)")
-    numbers = extract_numbers(question)
-    if len(numbers) < 7:
-        print("❗ Please include N, P, K, temperature, humidity, pH, and rainfall in your question.")
-    else:
-        features = numbers[:7]
-        prediction = model1.predict([features])
-        print("✅ Recommended Crop:", prediction[0])
-
-elif intent == 2:
-    print("🌍 Using Model 2 (Location & Season Recommender)")
-    state, district = extract_state_and_district(question)
-    season = extract_season(question)
-    if not (state and district and season):
-        print("❗ Please include state, district, and season in your question.")
-    else:
-        df_input = pd.DataFrame([[state, district, season]], columns=["State", "District", "Season"])
-        prediction = model2.predict(df_input)
-        print(f"✅ Recommended Crop for {district}, {state} in {season}: {prediction[0]}")
-
-elif intent == 3:
-    print("🔄 Using Model 3 (Crop Rotation Advisor)")
-    crop = extract_crop(question)
-    numbers = extract_numbers(question)
-    if not crop or len(numbers) < 7:
-        print("❗ Please mention current crop and basic soil info (NPK, pH, rainfall, etc.).")
-    else:
-        features = numbers[:7]
-        df_input = pd.DataFrame([features + [crop]], columns=[
-            'N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'current_crop'
-        ])
-        prediction = model3.predict(df_input)[0]
-        print(f"✅ Suggested next crop after {crop}: {prediction}")
-        print(f"📘 Reason: {crop} depletes specific nutrients. {prediction} supports soil recovery.")
+def answer(question, intent, doc):
+    """Answer one classified question and return the reply lines"""
+    reply = []
+    if intent == 1:
+        reply.append("🔍 Using Model 1 (Soil-based Crop Recommender)")
+        numbers = extract_numbers(question)
+        if len(numbers) < 7:
+            reply.append("❗ Please include N, P, K, temperature, humidity, pH, and rainfall in your question.")
+        else:
+            features = numbers[:7]
+            model1 = model_registry.get_model(model_registry.RECOMMENDATION_MODEL)  # NPK model
+            prediction = model1.predict([features])
+            reply.append(f"✅ Recommended Crop: {prediction[0]}")
+
+    elif intent == 2:
+        reply.append("🌍 Using Model 2 (Location & Season Recommender)")
+        state, district = extract_state_and_district(question, doc)
+        season = extract_season(question)
+        if not (state and district and season):
+            reply.append("❗ Please include state, district, and season in your question.")
+        else:
+            df_input = pd.DataFrame([[state, district, season]], columns=["State", "District", "Season"])
+            model2 = model_registry.get_model("crop_encoder")  # State-season model
+            prediction = model2.predict(df_input)
+            reply.append(f"✅ Recommended Crop for {district}, {state} in {season}: {prediction[0]}")
+
+    elif intent == 3:
+        reply.append("🔄 Using Model 3 (Crop Rotation Advisor)")
+        crop = extract_crop(question)
+        numbers = extract_numbers(question)
+        if not crop or len(numbers) < 7:
+            reply.append("❗ Please mention current crop and basic soil info (NPK, pH, rainfall, etc.).")
+        else:
+            features = numbers[:7]
+            df_input = pd.DataFrame([features + [crop]], columns=[
+                'N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'current_crop'
+            ])
+            model3 = model_registry.get_model("crop_rotation")  # Crop rotation
+            prediction = model3.predict(df_input)[0]
+            reply.append(f"✅ Suggested next crop after {crop}: {prediction}")
+            reply.append(f"📘 Reason: {crop} depletes specific nutrients. {prediction} supports soil recovery.")
+
+    return reply
+
+
+def answer_batch(questions):
+    """Answer several questions with one vectorizer call and one nlp.pipe pass
+
+    Returns the per-question results and the time spent in each stage (ms).
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    intents = clf.predict(vec.transform(questions))
+    timings["intent_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    docs = list(nlp.pipe(questions))
+    timings["nlp_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    results = []
+    for question, intent, doc in zip(questions, intents, docs):
+        try:
+            results.append({"intent": int(intent), "reply": answer(question, intent, doc)})
+        except Exception as e:
+            results.append({"intent": int(intent), "error": str(e)})
+    timings["answer_ms"] = (time.perf_counter() - start) * 1000
+
+    return results, timings
+
+
+def read_requests(stream, requests):
+    """Feed stdin lines into the request queue; None marks end of input"""
+    for line in stream:
+        line = line.strip()
+        if line:
+            requests.put(line)
+    requests.put(None)
+
+
+def parse_request(line):
+    """Accept {"id": ..., "question": ...} objects or bare question lines"""
+    try:
+        payload = json.loads(line)
+    except json.JSONDecodeError:
+        return None, line
+    if isinstance(payload, dict):
+        return payload.get("id"), str(payload.get("question", ""))
+    return None, str(payload)
+
+
+def serve(max_batch, window_ms):
+    """Answer JSON-lines questions from stdin until EOF, keeping every model warm
+
+    Questions that arrive within window_ms of each other (up to max_batch)
+    are answered together.
+    """
+    start = time.perf_counter()
+    model_registry.preload()
+    startup = {"preload_ms": (time.perf_counter() - start) * 1000, "models": model_registry.load_timings()}
+    print(json.dumps({"ready": True, **startup}), file=sys.stderr, flush=True)
+
+    requests = queue.Queue()
+    threading.Thread(target=read_requests, args=(sys.stdin, requests), daemon=True).start()
+
+    finished = False
+    while not finished:
+        batch = [requests.get()]
+        if batch[0] is None:
+            break
+        deadline = time.perf_counter() + window_ms / 1000
+        while len(batch) < max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                line = requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if line is None:
+                finished = True
+                break
+            batch.append(line)
+
+        ids, questions = zip(*(parse_request(line) for line in batch))
+        results, timings = answer_batch(list(questions))
+        timings["batch_size"] = len(batch)
+        for request_id, result in zip(ids, results):
+            print(json.dumps({"id": request_id, **result, "timings": timings}, ensure_ascii=False), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer farming questions with the crop models.")
+    parser.add_argument("--serve", action="store_true",
+                        help="keep models loaded and answer JSON-lines questions from stdin")
+    parser.add_argument("--max-batch", type=int, default=32, help="largest micro-batch in --serve mode")
+    parser.add_argument("--window-ms", type=float, default=5.0,
+                        help="how long to wait for more questions before answering a batch")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.max_batch, args.window_ms)
+        return
+
+    # Get user question
+    question = input("🧑‍🌾 Ask your question: ")
+
+    # Predict intent and run the NLP pipeline
+    intent = clf.predict(vec.transform([question]))[0]
+    doc = nlp(question)
+    print("\n".join(answer(question, intent, doc)))
+
+
+if __name__ == "__main__":
+    main()
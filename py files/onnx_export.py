@@ -0,0 +1,246 @@
+# onnx_export.py
+"""ONNX export and onnxruntime serving for the crop models.
+
+export_all() converts the recommendation forest, the rotation forest and
+the crop LabelEncoder into ONNX graphs next to their .pkl files. With
+MODEL_RUNTIME=onnx the model registry serves these graphs through
+onnxruntime instead of unpickling scikit-learn, which skips pandas
+construction and scikit-learn's input validation on every request. The
+wrappers keep the parts of the scikit-learn interface the apps use
+(predict, predict_proba, transform, classes_).
+
+Before conversion every tree threshold is rounded down to float32 (see
+flat_forest.float32_thresholds), so the float32 ONNX trees branch exactly
+like scikit-learn on the same inputs.
+
+Needs skl2onnx to export and onnxruntime to serve.
+
+Usage:
+    python onnx_export.py          (export, then check parity and latency)
+"""
+import copy
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+import model_registry
+from datastore import write_atomic
+from flat_forest import float32_thresholds
+
+TARGET_OPSET = 15
+
+# Single-record predictions timed per runtime
+LATENCY_REPEATS = 200
+
+
+def _session(path):
+    if onnxruntime is None:
+        raise ImportError("onnxruntime is required for MODEL_RUNTIME=onnx (pip install onnxruntime)")
+    options = onnxruntime.SessionOptions()
+    # Requests are single rows; one thread avoids pool hand-off overhead
+    options.intra_op_num_threads = 1
+    options.inter_op_num_threads = 1
+    return onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+def _metadata(session):
+    return {key: json.loads(value) for key, value in session.get_modelmeta().custom_metadata_map.items()}
+
+
+class OnnxClassifier:
+    """predict()/predict_proba() over an exported classifier graph"""
+
+    def __init__(self, path):
+        self.session = _session(path)
+        metadata = _metadata(self.session)
+        self.classes_ = np.asarray(metadata["classes"])
+        self.feature_names_in_ = np.asarray(metadata["feature_names"]) if metadata.get("feature_names") else None
+        self._input = self.session.get_inputs()[0].name
+
+    def _features(self, X):
+        if isinstance(X, pd.DataFrame) and self.feature_names_in_ is not None:
+            X = X[self.feature_names_in_]
+        X = np.asarray(X, dtype=np.float32)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def predict(self, X):
+        return self.session.run(["label"], {self._input: self._features(X)})[0]
+
+    def predict_proba(self, X):
+        return self.session.run(["probabilities"], {self._input: self._features(X)})[0]
+
+
+class OnnxLabelEncoder:
+    """transform()/inverse_transform() over an exported LabelEncoder graph"""
+
+    def __init__(self, path):
+        self.session = _session(path)
+        self.classes_ = np.asarray(_metadata(self.session)["classes"])
+        self._input = self.session.get_inputs()[0].name
+
+    def transform(self, values):
+        values = np.asarray(values, dtype=object).reshape(-1)
+        codes = self.session.run(None, {self._input: values})[0]
+        if (codes < 0).any():
+            # Same error scikit-learn raises for labels it never saw
+            raise ValueError(f"y contains previously unseen labels: {sorted(set(values[codes < 0]))}")
+        return codes
+
+    def inverse_transform(self, codes):
+        return self.classes_.take(np.asarray(codes))
+
+
+ONNX_WRAPPERS = {
+    "classifier": OnnxClassifier,
+    "label_encoder": OnnxLabelEncoder,
+}
+
+
+def load_onnx_model(path):
+    """Load an exported graph with the wrapper matching its kind"""
+    session = _session(path)
+    return ONNX_WRAPPERS[_metadata(session)["kind"]](path)
+
+
+def _with_metadata(onx, **metadata):
+    for key, value in metadata.items():
+        entry = onx.metadata_props.add()
+        entry.key = key
+        entry.value = json.dumps(value)
+    return onx
+
+
+def _save(onx, path):
+    # Atomically, so a server reloading the graph never reads a partial file
+    def write(tmp_path):
+        with open(tmp_path, "wb") as f:
+            f.write(onx.SerializeToString())
+    write_atomic(path, write)
+
+
+def exact_float32_forest(forest):
+    """Copy of a forest whose thresholds are already float32, so conversion can't round them"""
+    forest = copy.deepcopy(forest)
+    for estimator in forest.estimators_:
+        threshold = estimator.tree_.threshold
+        threshold[:] = float32_thresholds(threshold)
+    return forest
+
+
+def export_classifier(forest, path):
+    """Write a fitted forest classifier as an ONNX graph with label and probabilities outputs"""
+    from skl2onnx import to_onnx
+    from skl2onnx.common.data_types import FloatTensorType
+
+    forest = exact_float32_forest(forest)
+    onx = to_onnx(
+        forest,
+        initial_types=[("X", FloatTensorType([None, forest.n_features_in_]))],
+        options={id(forest): {"zipmap": False}},
+        target_opset=TARGET_OPSET,
+    )
+    feature_names = getattr(forest, "feature_names_in_", None)
+    _with_metadata(
+        onx,
+        kind="classifier",
+        classes=np.asarray(forest.classes_).astype(str).tolist(),
+        feature_names=None if feature_names is None else [str(name) for name in feature_names],
+    )
+    _save(onx, path)
+
+
+def export_label_encoder(encoder, path):
+    """Write a fitted LabelEncoder as an ONNX string -> code lookup"""
+    from skl2onnx import to_onnx
+    from skl2onnx.common.data_types import StringTensorType
+
+    onx = to_onnx(encoder, initial_types=[("X", StringTensorType([None]))], target_opset=TARGET_OPSET)
+    _with_metadata(onx, kind="label_encoder", classes=np.asarray(encoder.classes_).astype(str).tolist())
+    _save(onx, path)
+
+
+EXPORTERS = {
+    "crop_recommendation": export_classifier,
+    "crop_rotation": export_classifier,
+    "crop_encoder": export_label_encoder,
+}
+
+
+def export_all():
+    """Export every model in model_registry.ONNX_FILES; returns {name: path}"""
+    paths = {}
+    for name, exporter in EXPORTERS.items():
+        model = joblib.load(model_registry.model_path(name))
+        paths[name] = os.path.join(model_registry.MODEL_DIR, model_registry.ONNX_FILES[name])
+        exporter(model, paths[name])
+    return paths
+
+
+def _median_ms(call, repeats=LATENCY_REPEATS):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def check_classifier(name, model, runtime, X):
+    """Label and probability parity plus one-row latency, sklearn on a DataFrame vs ONNX on NumPy"""
+    same_labels = np.array_equal(np.asarray(model.predict(X)).astype(str), runtime.predict(X.to_numpy()).astype(str))
+    proba_error = float(np.abs(model.predict_proba(X) - runtime.predict_proba(X.to_numpy())).max())
+    row = X.iloc[:1]
+    sklearn_ms = _median_ms(lambda: model.predict(pd.DataFrame(row.to_numpy(), columns=X.columns)))
+    onnx_ms = _median_ms(lambda: runtime.predict(row.to_numpy()))
+    print(f"🔍 {name}: identical labels {same_labels}, max probability difference {proba_error:.2e}")
+    print(f"⏱️ {name}: single-record latency sklearn {sklearn_ms:.3f} ms, onnx {onnx_ms:.3f} ms")
+    return same_labels and proba_error < 1e-5
+
+
+def check_encoder(encoder, runtime):
+    same_codes = np.array_equal(encoder.transform(encoder.classes_), runtime.transform(encoder.classes_))
+    try:
+        runtime.transform(["not-a-crop"])
+        rejects_unknown = False
+    except ValueError:
+        rejects_unknown = True
+    sklearn_ms = _median_ms(lambda: encoder.transform([encoder.classes_[0]]))
+    onnx_ms = _median_ms(lambda: runtime.transform([encoder.classes_[0]]))
+    print(f"🔍 crop_encoder: identical codes {same_codes}, rejects unknown crops {rejects_unknown}")
+    print(f"⏱️ crop_encoder: single-record latency sklearn {sklearn_ms:.3f} ms, onnx {onnx_ms:.3f} ms")
+    return same_codes and rejects_unknown
+
+
+def main():
+    paths = export_all()
+    for name, path in paths.items():
+        print(f"✅ Exported {name} to {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+    from cropro import build_dataset
+    from datastore import load_table
+
+    df = load_table("Crop_recommendation.csv")
+    rotation_X = build_dataset(df)[0]
+    checks = [
+        check_classifier("crop_recommendation", joblib.load(model_registry.model_path("crop_recommendation")),
+                         load_onnx_model(paths["crop_recommendation"]), df.drop("label", axis=1)),
+        check_classifier("crop_rotation", joblib.load(model_registry.model_path("crop_rotation")),
+                         load_onnx_model(paths["crop_rotation"]), rotation_X),
+        check_encoder(joblib.load(model_registry.model_path("crop_encoder")), load_onnx_model(paths["crop_encoder"])),
+    ]
+    print(f"{'✅' if all(checks) else '❌'} ONNX parity {'passed' if all(checks) else 'FAILED'}")
+    if not all(checks):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
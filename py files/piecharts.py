@@ -0,0 +1,149 @@
+# piecharts.py
+"""Build the per-district crop pie charts used by the India crop map.
+
+Districts are rendered in parallel across a process pool. A manifest in
+the output folder stores a content hash of every district's crop
+distribution, so a rebuild only re-renders districts whose data changed.
+Each PNG (and the manifest) is written to a temporary file first and
+moved into place, so a crashed or interrupted build never leaves a
+half-written image behind.
+
+Usage:
+    python piecharts.py [--data crop_data.csv] [--out pie_charts] [--workers N] [--force]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from crop_aggregates import top_crops
+from datastore import load_table, write_atomic
+
+MANIFEST_FILE = "manifest.json"
+
+# Bump when the chart style changes so every chart is re-rendered
+RENDER_VERSION = 1
+
+# Crops beyond this many are merged into an "Others" slice
+MAX_SLICES = 8
+
+
+def chart_name(state, district):
+    """File name of a district's chart, e.g. agra_uttar_pradesh.png"""
+    return re.sub(r"[^a-z0-9]+", "_", f"{district} {state}".lower()).strip("_") + ".png"
+
+
+def district_distributions(df):
+    """Crop counts per (State, District), largest first, with a tail merged into Others"""
+    top = top_crops(df, ["State", "District"], "Crop", k=MAX_SLICES)
+
+    distributions = {}
+    for (state, district), group in top.groupby(["State", "District"], sort=False):
+        crops = group["Crop"].tolist()
+        sizes = group["count"].tolist()
+        total = int(group["total"].iat[0])
+        if sum(sizes) < total:
+            # More crops than slices: the top MAX_SLICES - 1 plus everything else
+            crops = crops[:MAX_SLICES - 1] + ["Others"]
+            sizes = sizes[:MAX_SLICES - 1] + [total - sum(sizes[:MAX_SLICES - 1])]
+        distributions[(state, district)] = (crops, sizes)
+    return distributions
+
+
+def distribution_hash(state, district, crops, sizes):
+    """Content hash of everything that ends up in a chart"""
+    payload = json.dumps([RENDER_VERSION, state, district, crops, [int(s) for s in sizes]])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_chart(path, title, crops, sizes):
+    """Render one pie chart to path (runs in a worker process)"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(6.4, 4.8))
+    ax.pie(sizes, labels=crops, autopct="%1.1f%%", startangle=90)
+    ax.set_title(title)
+    ax.axis("equal")
+    write_atomic(path, lambda tmp_path: fig.savefig(tmp_path, format="png"))
+    plt.close(fig)
+    return path
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+    write_atomic(os.path.join(out_dir, MANIFEST_FILE), write)
+
+
+def build_charts(df, out_dir="pie_charts", workers=None, force=False):
+    """Render charts whose distribution changed; returns (rendered, skipped) counts"""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {} if force else load_manifest(out_dir)
+
+    distributions = district_distributions(df)
+    jobs = {}
+    for (state, district), (crops, sizes) in distributions.items():
+        name = chart_name(state, district)
+        digest = distribution_hash(state, district, crops, sizes)
+        if manifest.get(name) == digest and os.path.exists(os.path.join(out_dir, name)):
+            continue
+        title = f"{district.title()}, {state.title()}"
+        jobs[name] = (digest, (os.path.join(out_dir, name), title, crops, sizes))
+
+    failures = {}
+    if jobs:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(render_chart, *args): name for name, (_, args) in jobs.items()}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failures[name] = e
+                        continue
+                    manifest[name] = jobs[name][0]
+        finally:
+            # Record whatever finished so a retry only redoes the failures
+            save_manifest(out_dir, manifest)
+
+    if failures:
+        name, error = next(iter(failures.items()))
+        raise RuntimeError(f"{len(failures)} of {len(jobs)} charts failed, e.g. {name}: {error}") from error
+
+    return len(jobs), len(distributions) - len(jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render per-district crop pie charts.")
+    parser.add_argument("--data", default="crop_data.csv")
+    parser.add_argument("--out", default="pie_charts")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="re-render every chart")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = load_table(args.data)
+    df["State"] = df["State"].str.strip().str.lower()
+    df["District"] = df["District"].str.strip().str.lower()
+
+    rendered, skipped = build_charts(df, args.out, args.workers, args.force)
+    print(f"✅ Rendered {rendered} charts, {skipped} unchanged, in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
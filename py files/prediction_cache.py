@@ -0,0 +1,135 @@
+# prediction_cache.py
+"""Bounded LRU cache of single-record predictions.
+
+Soil-card inputs repeat a lot: the same lab values, pH rounded to one
+decimal, district-average rainfall. A PredictionCache answers repeats
+without touching the model. Keys are the feature values, each snapped to
+a grid when a quantum is configured for its column (0 or unset keeps the
+exact value). Entries expire after PREDICTION_CACHE_TTL seconds, and the
+least recently used one is evicted once PREDICTION_CACHE_SIZE is reached.
+
+The cache remembers the SHA-256 of every model its entries came from, as
+loaded in memory (model_registry.loaded_fingerprint), and empties itself
+when the registry reloads one of them, e.g. after a retrain.
+
+Enabled in app.py when PREDICTION_CACHE_SIZE is set above 0, e.g.
+    PREDICTION_CACHE_SIZE=50000 PREDICTION_CACHE_QUANTA="ph=0.1,rainfall=5" python app.py
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import model_registry
+
+# Most predictions kept per route (0 disables the cache)
+CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "0"))
+
+# Seconds an entry stays valid
+CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+
+ENABLED = CACHE_SIZE > 0
+
+
+def parse_quanta(spec):
+    """Parse "ph=0.1,rainfall=5" into {"ph": 0.1, "rainfall": 5.0}"""
+    quanta = {}
+    for item in spec.split(","):
+        if item.strip():
+            column, step = item.split("=")
+            quanta[column.strip()] = float(step)
+    return quanta
+
+
+# Grid step per feature column; values are rounded to the nearest multiple before lookup
+QUANTA = parse_quanta(os.environ.get("PREDICTION_CACHE_QUANTA", ""))
+
+
+class PredictionCache:
+    """LRU + TTL cache of predictions that depend on model_names, keyed on quantized feature rows"""
+
+    def __init__(self, model_names, columns, maxsize=CACHE_SIZE, ttl=CACHE_TTL, quanta=None):
+        self.model_names = list(model_names)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        quanta = QUANTA if quanta is None else quanta
+        steps = np.array([quanta.get(column, 0.0) for column in columns])
+        self._quantized = steps > 0
+        self._divisors = np.where(self._quantized, steps, 1.0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._counts = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def key(self, row):
+        """Hashable key of a feature row, snapped to the configured grid"""
+        values = np.asarray(row, dtype=np.float64).reshape(-1)
+        values = np.where(self._quantized, np.round(values / self._divisors), values)
+        return tuple(values.tolist())
+
+    def _loaded_fingerprint(self):
+        return tuple(model_registry.loaded_fingerprint(name) for name in self.model_names)
+
+    def _served_fingerprint(self):
+        # get_model() loads, or reloads after a change on disk; outside the lock, as it may stat and rehash
+        for name in self.model_names:
+            model_registry.get_model(name)
+        return self._loaded_fingerprint()
+
+    def _check_model(self, fingerprint):
+        # Called with the lock held
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                self._counts["invalidations"] += 1
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def predict(self, row, compute):
+        """Cached prediction for row, calling compute(row) on a miss"""
+        key = self.key(row)
+        fingerprint = self._served_fingerprint()
+        now = time.monotonic()
+        with self._lock:
+            self._check_model(fingerprint)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counts["expirations"] += 1
+            self._counts["misses"] += 1
+
+        # Compute outside the lock so one slow prediction doesn't block cache hits
+        value = compute(row)
+        with self._lock:
+            if self._fingerprint != fingerprint or self._loaded_fingerprint() != fingerprint:
+                # A model was reloaded while computing; the answer may come from either one
+                return value
+            self._entries[key] = (value, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counts["evictions"] += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit rate, size and eviction counts since start-up"""
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return {
+                **self._counts,
+                "hit_rate": round(self._counts["hits"] / lookups, 4) if lookups else None,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "model_fingerprints": dict(zip(self.model_names, self._fingerprint or ())),
+            }
@@ -0,0 +1,55 @@
+# rotation.py
+"""Single-row input path for the crop rotation model.
+
+Instead of LabelEncoder.transform() plus an eight-column DataFrame per
+request, the crop -> code mapping and the model's feature order are
+worked out once per loaded model, and each request fills one NumPy row.
+"""
+import warnings
+from functools import lru_cache
+
+import numpy as np
+
+# Column order the rotation model was trained on (cropro.py)
+ROTATION_FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall', 'current_crop']
+
+
+
+class RotationInput:
+    """Crop codes and feature layout of one rotation model / encoder pair"""
+
+    def __init__(self, model, encoder):
+        # LabelEncoder codes are positions in classes_
+        self.crop_codes = {str(crop): code for code, crop in enumerate(encoder.classes_)}
+        self.known_crops = sorted(self.crop_codes)
+        names = getattr(model, "feature_names_in_", None)
+        self.columns = [str(name) for name in (ROTATION_FEATURES if names is None else names)]
+        self.crop_column = self.columns.index("current_crop")
+
+    def row(self, values, crop):
+        """One-row feature matrix from {feature: value} and the current crop, or None for an unknown crop"""
+        code = self.crop_codes.get(crop)
+        if code is None:
+            return None
+        row = np.empty((1, len(self.columns)))
+        for i, column in enumerate(self.columns):
+            row[0, i] = code if i == self.crop_column else values[column]
+        return row
+
+
+def predict(model, rows):
+    """model.predict(rows) for rows from RotationInput.row, without the feature-name warning
+
+    The model was fitted on a DataFrame and warns when handed a plain array;
+    these rows are already in its column order. The warning is only muted
+    around this call, so other models still report genuine mismatches.
+    """
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        return model.predict(rows)
+
+
+@lru_cache(maxsize=4)
+def rotation_input(model, encoder):
+    """RotationInput for a model / encoder pair, built on first use"""
+    return RotationInput(model, encoder)
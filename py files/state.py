@@ -1,23 +1,47 @@
-import pandas as pd
+from crop_aggregates import top_crops_by_location
+from datastore import load_table
+from stream_ingest import STREAMING, location_indexes
 
 def load_crop_data(file_path):
     """Load the crop data from CSV file"""
-    return pd.read_csv(file_path)
+    return load_table(file_path)
 
-def detect_crop(data, state, district, season):
+def location_key(state, district, season):
+    """Normalize a (state, district, season) triple the same way the index is keyed"""
+    return (state.lower(), district.lower(), season.lower())
+
+def build_crop_index(data):
+    """Map every lowercased (state, district, season) to its sorted list of crops"""
+    data = data.dropna(subset=['Crop'])
+    keys = [data[column].str.lower() for column in ('State', 'District', 'Season')]
+    grouped = data['Crop'].groupby(keys, sort=False).unique()
+    return {key: sorted(crops) for key, crops in grouped.items()}
+
+def build_top_crop_index(data, k=3):
+    """Map every lowercased (state, district, season) to its k most common crops and their shares"""
+    keys = ['State', 'District', 'Season']
+    lowered = data.assign(**{column: data[column].str.lower() for column in keys})
+    return top_crops_by_location(lowered, keys, k=k)
+
+def load_location_indexes(file_path='crop_data.csv'):
+    """Crop index and top-crop index of a crop data file, streamed in chunks when CROP_DATA_INGEST=stream"""
+    if STREAMING:
+        # Built from bounded chunks so memory doesn't grow with the file
+        return location_indexes(file_path)
+    data = load_crop_data(file_path)
+    return build_crop_index(data), build_top_crop_index(data)
+
+def lookup_crops(index, state, district, season):
+    """Return the crops grown for a location and season, or an empty list"""
+    return index.get(location_key(state, district, season), [])
+
+def detect_crop(index, state, district, season):
     """Detect crops based on state, district, and season"""
-    filtered = data[
-        (data['State'].str.lower() == state.lower()) & 
-        (data['District'].str.lower() == district.lower()) & 
-        (data['Season'].str.lower() == season.lower())
-    ]
-    
-    if filtered.empty:
+    crops = lookup_crops(index, state, district, season)
+
+    if not crops:
         return "No crops found for the given criteria."
-    
-    # Get unique crops
-    crops = filtered['Crop'].unique()
-    
+
     if len(crops) == 1:
         return f"The crop grown in {state}, {district} during {season} is: {crops[0]}"
     else:
@@ -26,8 +50,12 @@ def detect_crop(data, state, district, season):
 def main():
     # Load your CSV file (replace with your actual file path)
     file_path = 'crop_data.csv'
+    # Build the lookup index once so each query is a dictionary hit
     try:
-        crop_data = load_crop_data(file_path)
+        if STREAMING:
+            crop_index, _ = location_indexes(file_path)
+        else:
+            crop_index = build_crop_index(load_crop_data(file_path))
     except FileNotFoundError:
         print("Error: CSV file not found. Please check the file path.")
         return
@@ -38,7 +66,7 @@ def main():
     season = input("Enter the season (Kharif/Whole Year/etc.): ")
     
     # Detect and display crop
-    result = detect_crop(crop_data, state, district, season)
+    result = detect_crop(crop_index, state, district, season)
     print(result)
 
 if __name__ == "__main__":
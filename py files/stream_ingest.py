@@ -0,0 +1,146 @@
+# stream_ingest.py
+"""Bounded-memory ingestion of crop_data.csv.
+
+The CSV is read in fixed-size chunks and only running (location, crop)
+row counts are kept, in the order each pair first appears. Memory
+therefore grows with the number of distinct pairs, not with the number
+of rows, and the counts rank exactly like a groupby over the whole file
+(crop_aggregates.rank_crops), ties included.
+
+app.py, state.py and indiamap.py switch to this path when
+CROP_DATA_INGEST=stream is set.
+
+Usage:
+    python stream_ingest.py [--data crop_data.csv] [--chunk-rows N] [--check]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from crop_aggregates import crop_counts, location_lookup, most_common_from_counts, rank_crops
+
+# CROP_DATA_INGEST=stream builds the indexes chunk by chunk instead of loading the whole file
+STREAMING = os.environ.get("CROP_DATA_INGEST") == "stream"
+
+# Rows parsed per chunk
+CHUNK_ROWS = int(os.environ.get("INGEST_CHUNK_ROWS", "100000"))
+
+SEASON_KEYS = ["State", "District", "Season"]
+DISTRICT_KEYS = ["State", "District"]
+
+
+class PairCounter:
+    """Running (location, crop) row counts, kept in first-appearance order"""
+
+    def __init__(self, keys, crop="Crop"):
+        self.keys = list(keys)
+        self.crop = crop
+        self._counts = {}
+
+    def update(self, chunk):
+        counts = crop_counts(chunk, self.keys, self.crop)
+        columns = [counts[column].tolist() for column in self.keys + [self.crop, "count"]]
+        for *pair, count in zip(*columns):
+            pair = tuple(pair)
+            self._counts[pair] = self._counts.get(pair, 0) + count
+        return self
+
+    def counts(self):
+        """Counts so far, in the same layout as crop_aggregates.crop_counts()"""
+        rows = [(*pair, count) for pair, count in self._counts.items()]
+        return pd.DataFrame(rows, columns=self.keys + [self.crop, "count"])
+
+
+def read_chunks(path, columns, chunk_rows=None):
+    """Yield the given columns of a CSV in chunks of at most chunk_rows rows"""
+    yield from pd.read_csv(path, usecols=columns, chunksize=chunk_rows or CHUNK_ROWS)
+
+
+def count_pairs(path, keys, transform=None, chunk_rows=None):
+    """(location, Crop) counts of a CSV; transform(chunk) normalizes the key columns"""
+    counter = PairCounter(keys)
+    for chunk in read_chunks(path, list(keys) + ["Crop"], chunk_rows):
+        counter.update(transform(chunk) if transform else chunk)
+    return counter.counts()
+
+
+def lowercase_keys(chunk):
+    return chunk.assign(**{column: chunk[column].str.lower() for column in SEASON_KEYS})
+
+
+def location_indexes(path="crop_data.csv", k=3, chunk_rows=None):
+    """The crop index and top-crop index of state.py, built from chunks
+
+    Returns the same dictionaries as build_crop_index() and
+    build_top_crop_index() on the fully loaded file.
+    """
+    counts = count_pairs(path, SEASON_KEYS, lowercase_keys, chunk_rows)
+
+    crop_index = {}
+    for *key, crop in zip(*(counts[column].tolist() for column in SEASON_KEYS + ["Crop"])):
+        crop_index.setdefault(tuple(key), []).append(crop)
+    crop_index = {key: sorted(crops) for key, crops in crop_index.items()}
+
+    top_crop_index = location_lookup(rank_crops(counts, SEASON_KEYS, "Crop", k), SEASON_KEYS)
+    return crop_index, top_crop_index
+
+
+def district_counts(path="crop_data.csv", chunk_rows=None):
+    """(State, District, Crop) counts with names folded like the geocoding table"""
+    from geocode import fold_column
+
+    def fold_keys(chunk):
+        return chunk.assign(**{column: fold_column(chunk[column]) for column in DISTRICT_KEYS})
+
+    return count_pairs(path, DISTRICT_KEYS, fold_keys, chunk_rows)
+
+
+def peak_memory_mb():
+    """Peak resident set size of this process so far, or None where it can't be read"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def memory_note():
+    peak = peak_memory_mb()
+    return f", peak memory {peak:.0f} MB" if peak else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the crop_data.csv indexes from bounded chunks.")
+    parser.add_argument("--data", default="crop_data.csv")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--check", action="store_true",
+                        help="also load the whole file and compare the results")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    crop_index, top_crop_index = location_indexes(args.data, chunk_rows=args.chunk_rows)
+    most_common = most_common_from_counts(district_counts(args.data, args.chunk_rows))
+    print(f"✅ Streamed {len(crop_index)} locations, {len(most_common)} districts "
+          f"in {time.perf_counter() - start:.1f}s{memory_note()}")
+
+    if args.check:
+        from crop_aggregates import most_common_crop
+        from geocode import fold_column
+        from state import build_crop_index, build_top_crop_index
+
+        data = pd.read_csv(args.data)
+        folded = data.assign(**{column: fold_column(data[column]) for column in DISTRICT_KEYS})
+        matches = (
+            crop_index == build_crop_index(data),
+            top_crop_index == build_top_crop_index(data),
+            most_common.equals(most_common_crop(folded)),
+        )
+        print(f"🔍 Matches in-memory results: {all(matches)}{memory_note()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, accuracy_score
-import joblib  # Optional: to save the model
+
+from datastore import load_table
+from flat_forest import export_forest, save_flat_forest
+from model_registry import save_model
 
 # Load the dataset
-df = pd.read_csv("Crop_recommendation.csv")
+df = load_table("Crop_recommendation.csv")
 
 # Features and target
 X = df.drop("label", axis=1)
@@ -16,9 +18,11 @@ X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42
 )
 
-# Initialize and train model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
+# Initialize and train model on every core, then serve it single-threaded
+# (n_jobs only adds thread start-up cost to one-row predictions)
+model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
 model.fit(X_train, y_train)
+model.set_params(n_jobs=None)
 
 # Predict and evaluate
 y_pred = model.predict(X_test)
@@ -29,4 +33,7 @@ print("📋 Classification Report:\n")
 print(classification_report(y_test, y_pred))
 
 # Optional: Save the trained model
-joblib.dump(model, "crop_recommendation_model.pkl")
+save_model(model, "crop_recommendation_model.pkl")
+
+# Export the packed flat-array version served with CROP_MODEL_BACKEND=flat
+save_flat_forest(export_forest(model))
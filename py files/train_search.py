@@ -0,0 +1,217 @@
+# train_search.py
+"""Parallel hyperparameter search for the crop random forests.
+
+Every candidate (trees, depth, min_samples_leaf, max_features) is
+cross-validated in its own worker process. Besides accuracy, each run
+records the pickled model size and a first estimate of the fit time and
+single-record predict latency. Those estimates are taken while other
+candidates train on every core, so the candidates on the resulting
+Pareto front of (accuracy, latency, size) are refit and timed again one
+at a time in the main process, and the front is recomputed from those
+timings. Among its candidates within --tolerance of the best accuracy,
+the fastest one wins, then the smallest.
+
+Usage:
+    python train_search.py [--model recommendation|rotation] [--workers N] [--cv 5]
+                           [--tolerance 0.005] [--results search_results.csv] [--save]
+"""
+import argparse
+import io
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_validate, train_test_split
+
+from datastore import load_table
+from model_registry import save_model
+
+PARAM_GRID = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_depth": [None, 8, 16],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", "log2", None],
+}
+
+MODEL_FILES = {
+    "recommendation": "crop_recommendation_model.pkl",
+    "rotation": "crop_rotation_model.pkl",
+}
+
+# Single-record predictions timed per candidate
+LATENCY_REPEATS = 30
+
+# Training split shared with the worker processes by the pool initializer
+_data = {}
+
+
+def load_dataset(name):
+    """(X, y, extra artifacts to save) for one of the two models"""
+    df = load_table("Crop_recommendation.csv")
+    if name == "rotation":
+        from cropro import build_dataset
+        X, y, crop_encoder = build_dataset(df)
+        return X, y, {"crop_encoder.pkl": crop_encoder}
+    return df.drop("label", axis=1), df["label"], {}
+
+
+def candidates(grid=PARAM_GRID):
+    """Every combination of the grid as a params dict"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def model_size(model):
+    """Bytes of the pickled model, as joblib writes it"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def predict_latency_ms(model, row, repeats=LATENCY_REPEATS):
+    """Median wall time of a one-record predict()"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def _init_worker(X, y, X_test, y_test, cv):
+    _data.update(X=X, y=y, X_test=X_test, y_test=y_test, cv=cv)
+
+
+def evaluate(candidate, params):
+    """Cross-validate one candidate and measure its serving cost (runs in a worker)"""
+    X, y = _data["X"], _data["y"]
+    model = RandomForestClassifier(random_state=42, **params)
+    folds = StratifiedKFold(n_splits=_data["cv"], shuffle=True, random_state=42)
+    scores = cross_validate(model, X, y, cv=folds)
+
+    fit_seconds, latency_ms = fit_and_time(model, X, y)
+    return {
+        "candidate": candidate,
+        **params,
+        "cv_accuracy": float(scores["test_score"].mean()),
+        "cv_std": float(scores["test_score"].std()),
+        "test_accuracy": float(model.score(_data["X_test"], _data["y_test"])),
+        "fit_seconds": fit_seconds,
+        "latency_ms": latency_ms,
+        "size_bytes": model_size(model),
+        "timed_alone": False,
+    }
+
+
+def fit_and_time(model, X, y):
+    """Fit model on X, y; returns (fit seconds, single-record predict latency in ms)"""
+    start = time.perf_counter()
+    model.fit(X, y)
+    return time.perf_counter() - start, predict_latency_ms(model, X.iloc[:1])
+
+
+def pareto_front(results):
+    """Mask of candidates no other candidate beats on accuracy, latency and size at once"""
+    accuracy = results["cv_accuracy"].to_numpy()
+    latency = results["latency_ms"].to_numpy()
+    size = results["size_bytes"].to_numpy()
+
+    front = np.ones(len(results), dtype=bool)
+    for i in range(len(results)):
+        no_worse = (accuracy >= accuracy[i]) & (latency <= latency[i]) & (size <= size[i])
+        better = (accuracy > accuracy[i]) | (latency < latency[i]) | (size < size[i])
+        front[i] = not (no_worse & better).any()
+    return front
+
+
+def retime_front(results, X, y):
+    """Refit and time the Pareto candidates one at a time, then recompute the front from those timings"""
+    front = results.index[results["pareto"]]
+    grid = candidates()
+    for done, i in enumerate(front, 1):
+        model = RandomForestClassifier(random_state=42, **grid[results.at[i, "candidate"]])
+        results.loc[i, ["fit_seconds", "latency_ms"]] = fit_and_time(model, X, y)
+        results.at[i, "timed_alone"] = True
+        print(f"\r⏱️ Re-timed {done}/{len(front)} Pareto candidates", end="", flush=True)
+    print()
+
+    # Only candidates timed under the same quiet conditions are compared with each other
+    results["pareto"] = False
+    results.loc[front, "pareto"] = pareto_front(results.loc[front])
+    return results
+
+
+def select_for_serving(results, tolerance):
+    """Fastest (then smallest) Pareto-optimal candidate within tolerance of the best accuracy"""
+    front = results[results["pareto"]]
+    eligible = front[front["cv_accuracy"] >= front["cv_accuracy"].max() - tolerance]
+    return eligible.sort_values(["latency_ms", "size_bytes"]).iloc[0]
+
+
+def search(X, y, X_test, y_test, cv=5, workers=None):
+    """Evaluate every candidate across a process pool; returns one row per candidate"""
+    rows = []
+    grid = candidates()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, y, X_test, y_test, cv)) as pool:
+        futures = [pool.submit(evaluate, candidate, params) for candidate, params in enumerate(grid)]
+        for done, future in enumerate(as_completed(futures), 1):
+            rows.append(future.result())
+            print(f"\r⏳ {done}/{len(grid)} candidates", end="", flush=True)
+    print()
+
+    results = pd.DataFrame(rows)
+    results["pareto"] = pareto_front(results)
+    results = retime_front(results, X, y)
+    return results.sort_values("cv_accuracy", ascending=False).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated, latency-aware random forest search.")
+    parser.add_argument("--model", choices=sorted(MODEL_FILES), default="recommendation")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--cv", type=int, default=5, help="cross-validation folds")
+    parser.add_argument("--tolerance", type=float, default=0.005,
+                        help="accuracy a faster model may give up against the most accurate one")
+    parser.add_argument("--results", default="search_results.csv", help="where to write every candidate's scores")
+    parser.add_argument("--save", action="store_true", help="refit the selected model and overwrite the served one")
+    args = parser.parse_args()
+
+    X, y, extras = load_dataset(args.model)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    start = time.perf_counter()
+    results = search(X_train, y_train, X_test, y_test, args.cv, args.workers)
+    results.to_csv(args.results, index=False)
+    print(f"✅ Searched {len(results)} candidates in {time.perf_counter() - start:.1f}s "
+          f"({int(results['pareto'].sum())} on the Pareto front), results in {args.results}")
+
+    columns = list(PARAM_GRID) + ["cv_accuracy", "test_accuracy", "fit_seconds", "latency_ms", "size_bytes"]
+    print("\n📋 Pareto front:\n")
+    print(results.loc[results["pareto"], columns].to_string(index=False))
+
+    best = select_for_serving(results, args.tolerance)
+    params = candidates()[best["candidate"]]
+    print(f"\n🏆 Selected for serving: {params} "
+          f"(accuracy {best['cv_accuracy'] * 100:.2f}%, {best['latency_ms']:.2f} ms, {best['size_bytes'] / 1024:.0f} KB)")
+
+    if args.save:
+        # Fit on every core, then serve single-threaded
+        model = RandomForestClassifier(random_state=42, n_jobs=-1, **params)
+        model.fit(X_train, y_train)
+        model.set_params(n_jobs=None)
+        save_model(model, MODEL_FILES[args.model])
+        for path, artifact in extras.items():
+            save_model(artifact, path)
+        if args.model == "recommendation":
+            from flat_forest import export_forest, save_flat_forest
+            save_flat_forest(export_forest(model))
+        print(f"💾 Saved {MODEL_FILES[args.model]}")
+
+
+if __name__ == "__main__":
+    main()